@@ -1,11 +1,12 @@
 # app.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from urllib.parse import urlsplit
+from werkzeug.test import EnvironBuilder
 from flask_cors import CORS
-import json
+import atexit
 import os
 import time
 from datetime import datetime
-from drive_service import save_sessions_to_drive, load_sessions_from_drive
 from tea_service import (
     get_tea_collection, 
     get_tea_by_id, 
@@ -14,92 +15,229 @@ from tea_service import (
     update_tea, 
     delete_tea
 )
-from cache_middleware import cache_manager
+from cache_middleware import MAX_ENCODED_VARIANTS
+from file_store import file_lock, read_json, write_json_atomic
+from migrations import migrate_sessions
+from write_coordinator import WriteCoordinator
+from drive_outbox import DriveUnavailable
+from request_snapshot import snapshot_scope, snapshot_clear, snapshot_get
+from events import event_stream, parse_last_event_id
+from binary_snapshot import write_snapshot
+from record_set import RecordSet
+from projection import parse_fields, project, project_all, project_dashboard
+from tenants import (
+    tenant_registry,
+    current_tenant,
+    set_current_tenant,
+    tenant_scope,
+    parse_user_id,
+    USER_HEADER
+)
 from models import Tea, Session
 from utils import ensure_string_id, is_valid_id
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# File to store sessions locally
-LOCAL_STORAGE_FILE = 'tea_sessions.json'
-
 # Configuration
 SYNC_INTERVAL = 60  # Default sync interval in seconds (can be changed by client)
 
+# Group commit of session writes: wait at most this long to batch concurrent writes
+WRITE_BATCH_MAX_LATENCY = float(os.environ.get('TEA_LOGGER_WRITE_BATCH_LATENCY', '0.002'))
+WRITE_BATCH_MAX_SIZE = int(os.environ.get('TEA_LOGGER_WRITE_BATCH_SIZE', '64'))
+
+def write_data_snapshots():
+    """Refresh stale binary snapshots of the loaded tenants so the next start is fast."""
+    tenants = [tenant_registry.default] + list(tenant_registry.tenants.values())
+    for tenant in filter(None, tenants):
+        for json_path, snapshot in ((tenant.sessions_file, tenant.sessions_snapshot),
+                                    (tenant.teas_file, tenant.tea_snapshot)):
+            try:
+                if snapshot.current_view() is None:
+                    write_snapshot(json_path)
+            except Exception as e:
+                print(f"Error writing snapshot for {json_path}: {e}")
+
+atexit.register(write_data_snapshots)
+
+@app.before_request
+def enter_tenant():
+    """Serve the request from the data of the user named in the request header."""
+    try:
+        user_id = parse_user_id(request.headers.get(USER_HEADER))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    tenant = tenant_registry.acquire(user_id)
+    request.environ['tea_logger.tenant'] = tenant
+    request.environ['tea_logger.previous_tenant'] = set_current_tenant(tenant)
+
+@app.teardown_request
+def leave_tenant(exc=None):
+    """Release the request's tenant so it can be evicted once idle."""
+    tenant = request.environ.pop('tea_logger.tenant', None)
+    if tenant is not None:
+        set_current_tenant(request.environ.pop('tea_logger.previous_tenant'))
+        tenant_registry.release(tenant)
+
 def get_sessions_from_storage(use_drive=False, force_sync=False):
     """Get sessions from either Google Drive or local storage with caching."""
+    if force_sync:
+        return load_sessions_from_storage(use_drive, force_sync)
+    
+    return snapshot_get('sessions', lambda: load_sessions_from_storage(use_drive))
+
+def load_sessions_from_storage(use_drive=False, force_sync=False):
+    """Load sessions from the cache, Google Drive or the local file."""
+    tenant = current_tenant()
+    
     # Check cache first
-    cached_sessions = cache_manager.get('sessions', force_sync)
+    cached_sessions = tenant.cache.get('sessions', force_sync)
     if cached_sessions is not None:
         return cached_sessions
     
-    # Sync with Google Drive if requested
-    if use_drive:
+    # Sync with Google Drive if requested, unless local changes are still waiting to be pushed
+    if use_drive and not tenant.drive_outbox.pending():
         try:
+            # Drive's copy also replaces the local file, unless a local write raced with it
             drive_sessions = load_sessions_from_drive()
-            
-            # Update cache
-            cache_manager.set('sessions', drive_sessions)
-            
-            # Also update local file as backup
-            with open(LOCAL_STORAGE_FILE, 'w') as f:
-                json.dump(drive_sessions, f)
-                
-            return drive_sessions
+            if drive_sessions is not None:
+                return drive_sessions
         except Exception as e:
             print(f"Error loading from Google Drive: {e}")
             # Fall back to local file
     
+    # Read the version first so a concurrent write leaves the cache stale
+    version = tenant.cache.current_version('sessions')
+    
     # Use local file
-    if os.path.exists(LOCAL_STORAGE_FILE):
-        with open(LOCAL_STORAGE_FILE, 'r') as f:
-            local_sessions = json.load(f)
-            
+    local_sessions = read_json(tenant.sessions_file)
+    if local_sessions is not None:
+        local_sessions = RecordSet(local_sessions)
+        
         # Update cache
-        cache_manager.set('sessions', local_sessions)
+        tenant.cache.set('sessions', local_sessions, version)
         
         return local_sessions
     
     # No data available
-    return []
+    return RecordSet()
+
+def load_sessions_from_drive():
+    """Load sessions from Google Drive and store them locally.
+
+    Returns None without storing them if sessions were written locally while
+    Drive was being read, since Drive doesn't have those writes yet.
+    """
+    tenant = current_tenant()
+    version = tenant.stamp.get('sessions')
+    # The migrations change the teas they are given, so they get copies of the shared records
+    teas = [dict(tea) for tea in get_tea_collection()]
+    drive_sessions = RecordSet(migrate_sessions(
+        tenant.drive_outbox.call(tenant.drive_sync.load_sessions), teas))
+    
+    with file_lock(tenant.sessions_file):
+        if tenant.stamp.get('sessions') != version or tenant.drive_outbox.pending():
+            return None
+        store_local_sessions(drive_sessions)
+    
+    tenant.publish_change('sessions')
+    return drive_sessions
+
+def store_local_sessions(sessions):
+    """Atomically write sessions to the local file and publish the new version."""
+    tenant = current_tenant()
+    with file_lock(tenant.sessions_file):
+        write_json_atomic(tenant.sessions_file, sessions)
+        tenant.stamp.bump('sessions')
+        
+        # Update cache
+        tenant.cache.set('sessions', sessions)
 
 def save_sessions_to_storage(sessions, use_drive=False):
     """Save sessions to either Google Drive or local storage with caching."""
-    # Update cache
-    cache_manager.set('sessions', sessions)
-    cache_manager.invalidate('dashboard')  # Invalidate dashboard cache
-    
     # Always save to local file
-    with open(LOCAL_STORAGE_FILE, 'w') as f:
-        json.dump(sessions, f)
+    store_local_sessions(sessions)
+    current_tenant().cache.invalidate('dashboard')  # Invalidate dashboard cache
     
-    # Save to Google Drive if requested
+    # Queue a push to Google Drive if requested; the outbox retries until it succeeds
     if use_drive:
-        try:
-            save_sessions_to_drive(sessions)
-            return True
-        except Exception as e:
-            print(f"Error saving to Google Drive: {e}")
-            return False
+        current_tenant().drive_outbox.enqueue_save_sessions()
     
     return True
 
+def find_session(session_id, use_drive=False):
+    """Find a session by ID, using the binary snapshot while it is current."""
+    if not use_drive:
+        view = current_tenant().sessions_snapshot.current_view()
+        if view is not None:
+            return view.get(session_id)
+    
+    return get_sessions_from_storage(use_drive).get(session_id)
+
+def load_sessions_draft(use_drive=False):
+    """Start the next version of the sessions from the stored one, never a request snapshot."""
+    return load_sessions_from_storage(use_drive).draft()
+
+def save_sessions_draft(draft, use_drive=False):
+    """Save the version of the sessions built in a draft."""
+    return save_sessions_to_storage(draft.freeze(), use_drive)
+
+@tenant_registry.on_load
+def setup_tenant(tenant):
+    """Apply each tenant's concurrent session mutations in batches with a single load and save.
+
+    Each batch edits a draft of the current sessions, so readers keep the
+    version they hold while the next one is built.
+    """
+    tenant.session_writes = WriteCoordinator(
+        load=load_sessions_draft,
+        persist=save_sessions_draft,
+        lock=lambda: file_lock(tenant.sessions_file),
+        scope=lambda: tenant_scope(tenant),
+        max_batch_size=WRITE_BATCH_MAX_SIZE,
+        max_latency=WRITE_BATCH_MAX_LATENCY
+    )
+
+# Bring the default data files up to the current schema once, before serving requests
+tenant_registry.get()
+
+def cached_json_response(resource_type, data, key=None, build=None):
+    """Serialize data, or the projection built from it, reusing the cached encoding.
+
+    Encodings are cached per key, such as a field set, for as long as data
+    is the resource's cached copy.
+    """
+    encoded = current_tenant().cache.encodings(resource_type, data)
+    body = encoded.get(key)
+    if body is None:
+        body = app.json.dumps(build(data) if build else data)
+        if len(encoded) < MAX_ENCODED_VARIANTS:
+            encoded[key] = body
+    
+    return Response(body, mimetype=app.json.mimetype)
+
 @app.route('/api/sessions', methods=['GET'])
 def get_sessions():
-    """Get all tea sessions."""
+    """Get all tea sessions, optionally with only the comma-separated fields."""
     global SYNC_INTERVAL
     
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
     use_drive = request.args.get('use_drive', 'false').lower() == 'true'
     force_sync = request.args.get('force_sync', 'false').lower() == 'true'
     sync_interval = int(request.args.get('sync_interval', SYNC_INTERVAL))
     
     # Update the sync interval if provided
     SYNC_INTERVAL = sync_interval
-    cache_manager.set_ttl('sessions', sync_interval)
+    current_tenant().cache.set_ttl('sessions', sync_interval)
     
     sessions = get_sessions_from_storage(use_drive, force_sync)
-    return jsonify(sessions)
+    return cached_json_response('sessions', sessions, fields,
+                                lambda data: project_all(data, fields))
 
 TEA_NAME_REQUIRED = "Tea name is required"
 
@@ -117,17 +255,22 @@ def create_session():
         # Create a Session object from the data
         session = Session.from_dict(session_data)
         
+        # Link the session to its tea once, so reads never need to match by name
+        if not session.teaId:
+            tea = get_tea_by_name(session.name)
+            if tea:
+                session.teaId = tea['id']
+        
         # Convert back to dictionary for storage
         session_dict = session.to_dict()
         
-        # Load existing sessions
-        sessions = get_sessions_from_storage(use_drive)
-        
-        # Add new session
-        sessions.append(session_dict)
+        def add_session(sessions):
+            return sessions.append(session_dict)
         
-        # Save sessions
-        save_sessions_to_storage(sessions, use_drive)
+        # Add new session and save it together with any concurrent writes
+        tenant = current_tenant()
+        tenant.session_writes.submit(add_session, use_drive)
+        tenant.publish_change('sessions', session_dict['id'])
         
         return jsonify(session_dict), 201
     except Exception as e:
@@ -135,6 +278,32 @@ def create_session():
 
 SESSION_NOT_FOUND = "Session not found"
 
+@app.route('/api/sessions/recent', methods=['GET'])
+def get_recent_sessions():
+    """Get the most recent tea sessions, newest first."""
+    try:
+        use_drive = request.args.get('use_drive', 'false').lower() == 'true'
+        limit = max(0, int(request.args.get('limit', 5)))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        if not use_drive:
+            view = current_tenant().sessions_snapshot.current_view()
+            if view is not None:
+                return jsonify(project_all(view.recent(limit), fields))
+        
+        sessions = get_sessions_from_storage(use_drive)
+        recent_sessions = sorted(sessions, key=lambda s: s.get('timestamp', ''), reverse=True)
+        return jsonify(project_all(recent_sessions[:limit], fields))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/sessions/<session_id>', methods=['GET'])
 def get_session(session_id):
     """Get a specific tea session by ID."""
@@ -145,12 +314,16 @@ def get_session(session_id):
             
         session_id = ensure_string_id(session_id)
         use_drive = request.args.get('use_drive', 'false').lower() == 'true'
-        sessions = get_sessions_from_storage(use_drive)
+        
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         # Find session with matching ID
-        for session in sessions:
-            if str(session.get('id')) == session_id:
-                return jsonify(session)
+        session = find_session(session_id, use_drive)
+        if session:
+            return jsonify(project(session, fields))
         
         return jsonify({"error": SESSION_NOT_FOUND}), 404
     except Exception as e:
@@ -168,28 +341,26 @@ def update_session(session_id):
         session_data = request.json
         use_drive = request.args.get('use_drive', 'false').lower() == 'true'
         
-        sessions = get_sessions_from_storage(use_drive)
+        def apply_update(sessions):
+            # Find session
+            position = sessions.find(session_id)
+            if position is None:
+                return None
+            
+            # Create a Session object from the existing data updated with new data
+            updated_session = Session.from_dict({**sessions[position], **session_data})
+            
+            # Add updated timestamp
+            updated_session.updated = datetime.now().isoformat()
+            
+            # Store a new version of the session in place of the old one
+            return sessions.replace(position, updated_session.to_dict())
         
-        # Find and update session
-        for i, session in enumerate(sessions):
-            if str(session.get('id')) == session_id:
-                # Create a Session object from the existing data
-                updated_session = Session.from_dict(session)
-                
-                # Update with new data
-                for key, value in session_data.items():
-                    setattr(updated_session, key, value)
-                
-                # Add updated timestamp
-                updated_session.updated = datetime.now().isoformat()
-                
-                # Convert back to dictionary for storage
-                sessions[i] = updated_session.to_dict()
-                
-                # Save sessions
-                save_sessions_to_storage(sessions, use_drive)
-                
-                return jsonify(sessions[i])
+        tenant = current_tenant()
+        updated = tenant.session_writes.submit(apply_update, use_drive)
+        if updated is not None:
+            tenant.publish_change('sessions', session_id)
+            return jsonify(updated)
         
         return jsonify({"error": SESSION_NOT_FOUND}), 404
     except Exception as e:
@@ -205,22 +376,18 @@ def delete_session(session_id):
             
         session_id = ensure_string_id(session_id)
         use_drive = request.args.get('use_drive', 'false').lower() == 'true'
-        sessions = get_sessions_from_storage(use_drive)
         
-        # Find session index
-        session_index = None
-        for i, session in enumerate(sessions):
-            if str(session.get('id')) == session_id:
-                session_index = i
-                break
-        
-        if session_index is not None:
-            # Remove session
-            deleted_session = sessions.pop(session_index)
-            
-            # Save sessions
-            save_sessions_to_storage(sessions, use_drive)
-            
+        def apply_delete(sessions):
+            # Find and remove session
+            position = sessions.find(session_id)
+            if position is None:
+                return None
+            return sessions.pop(position)
+        
+        tenant = current_tenant()
+        deleted_session = tenant.session_writes.submit(apply_delete, use_drive)
+        if deleted_session is not None:
+            tenant.publish_change('sessions', session_id)
             return jsonify({"message": "Session deleted", "session": deleted_session})
         
         return jsonify({"error": SESSION_NOT_FOUND}), 404
@@ -230,22 +397,29 @@ def delete_session(session_id):
 @app.route('/api/sync', methods=['POST'])
 def force_sync():
     """Force synchronization with Google Drive."""
+    tenant = current_tenant()
     try:
         use_drive = request.args.get('use_drive', 'false').lower() == 'true'
         
         if not use_drive:
             return jsonify({"success": False, "message": "Google Drive not enabled"}), 400
         
-        # Force sync from Google Drive
-        drive_sessions = load_sessions_from_drive()
-        
-        # Update cache and local file
-        cache_manager.set('sessions', drive_sessions)
+        # Push pending local changes first so they aren't overwritten
+        if not tenant.drive_outbox.drain():
+            status = tenant.drive_outbox.status()
+            message = status['last_error'] or "Google Drive unavailable"
+            return jsonify({"success": False, "message": message,
+                            "retry_after": status['retry_after']}), 503
         
-        with open(LOCAL_STORAGE_FILE, 'w') as f:
-            json.dump(drive_sessions, f)
+        # Force sync from Google Drive, which also updates the cache and local file
+        if load_sessions_from_drive() is None:
+            return jsonify({"success": False,
+                            "message": "Sessions changed during sync, please retry"}), 409
         
         return jsonify({"success": True, "message": "Synced with Google Drive successfully"})
+    except DriveUnavailable as e:
+        return jsonify({"success": False, "message": str(e),
+                        "retry_after": tenant.drive_outbox.breaker.retry_after()}), 503
     except Exception as e:
         print(f"Error in force_sync: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
@@ -253,7 +427,8 @@ def force_sync():
 @app.route('/api/sync/status', methods=['GET'])
 def get_sync_status():
     """Get the current sync status."""
-    cache = cache_manager.caches.get('sessions', {})
+    tenant = current_tenant()
+    cache = tenant.cache.caches.get('sessions', {})
     current_time = time.time()
     last_sync = cache.get('last_sync', 0)
     time_since_sync = current_time - last_sync
@@ -262,7 +437,9 @@ def get_sync_status():
         "last_sync": last_sync,
         "time_since_sync": time_since_sync,
         "sync_interval": SYNC_INTERVAL,
-        "drive_dirty": cache.get('dirty', False)
+        "drive_dirty": cache.get('dirty', False),
+        "drive_outbox": tenant.drive_outbox.status(),
+        "tenants": tenant_registry.stats()
     })
 
 @app.route('/api/sync/interval', methods=['POST'])
@@ -277,7 +454,7 @@ def set_sync_interval():
             return jsonify({"success": False, "message": "Invalid sync interval"}), 400
         
         SYNC_INTERVAL = interval
-        cache_manager.set_ttl('sessions', interval)
+        current_tenant().cache.set_ttl('sessions', interval)
         
         return jsonify({
             "success": True, 
@@ -289,15 +466,22 @@ def set_sync_interval():
 
 @app.route('/api/teas', methods=['GET'])
 def get_teas():
-    """Get all teas."""
+    """Get all teas, optionally with only the comma-separated fields."""
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    cache = current_tenant().cache
+    
     # Check cache first
-    cached_teas = cache_manager.get('teas')
-    if cached_teas is not None:
-        return jsonify(cached_teas)
-        
-    teas = get_tea_collection()
-    cache_manager.set('teas', teas)
-    return jsonify(teas)
+    teas = cache.get('teas')
+    if teas is None:
+        version = cache.current_version('teas')
+        teas = get_tea_collection()
+        cache.set('teas', teas, version)
+    
+    return cached_json_response('teas', teas, fields, lambda data: project_all(data, fields))
 
 @app.route('/api/teas', methods=['POST'])
 def create_tea_route():
@@ -316,8 +500,8 @@ def create_tea_route():
         new_tea = create_tea(tea.to_dict())
         
         # Invalidate caches
-        cache_manager.invalidate('teas')
-        cache_manager.invalidate('dashboard')
+        current_tenant().cache.invalidate('teas')
+        current_tenant().cache.invalidate('dashboard')
         
         return jsonify(new_tea), 201
     except Exception as e:
@@ -332,17 +516,22 @@ def get_tea_route(tea_id):
     if not is_valid_id(tea_id):
         return jsonify({"error": "Invalid tea ID"}), 400
         
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+        
     tea_id = ensure_string_id(tea_id)
     tea = get_tea_by_id(tea_id)
     
     if tea:
-        return jsonify(tea)
+        return jsonify(project(tea, fields))
     
     # If tea not found by ID, try to find by name
     # This is for backward compatibility
     tea = get_tea_by_name(tea_id)
     if tea:
-        return jsonify(tea)
+        return jsonify(project(tea, fields))
     
     return jsonify({"error": TEA_NOT_FOUND}), 404
 
@@ -356,6 +545,63 @@ def get_tea_by_name_route(name):
     
     return jsonify({"error": TEA_NOT_FOUND}), 404
 
+def update_tea_sessions(tea_id, changes, use_drive=False):
+    """Apply changes to the sessions of a tea, found through the index, and return their count."""
+    tenant = current_tenant()
+    
+    def apply_changes(sessions):
+        return sessions.update_records(sessions.tea_index.sessions_of(tea_id), changes) or None
+    
+    count = tenant.session_writes.submit(apply_changes, use_drive)
+    if count:
+        tenant.publish_change('sessions')
+    return count or 0
+
+TEA_SESSIONS_PAGE_SIZE = 20
+TEA_SESSIONS_MAX_PAGE_SIZE = 100
+
+@app.route('/api/teas/<tea_id>/sessions', methods=['GET'])
+def get_tea_sessions(tea_id):
+    """Get a page of a tea's sessions, newest first.
+
+    Takes offset and limit query parameters and returns the page together
+    with the tea's total session count.
+    """
+    # Validate ID
+    if not is_valid_id(tea_id):
+        return jsonify({"error": "Invalid tea ID"}), 400
+    
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = max(0, min(TEA_SESSIONS_MAX_PAGE_SIZE,
+                           int(request.args.get('limit', TEA_SESSIONS_PAGE_SIZE))))
+    except ValueError:
+        return jsonify({"error": "Invalid offset or limit"}), 400
+    
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        tea_id = ensure_string_id(tea_id)
+        use_drive = request.args.get('use_drive', 'false').lower() == 'true'
+        
+        sessions = get_sessions_from_storage(use_drive)
+        page, total = sessions.tea_index.page(tea_id, offset, limit)
+        
+        if not total and not get_tea_by_id(tea_id):
+            return jsonify({"error": TEA_NOT_FOUND}), 404
+        
+        return jsonify({
+            'sessions': project_all(page, fields),
+            'total': total,
+            'offset': offset,
+            'limit': limit
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/teas/<tea_id>', methods=['PUT'])
 def update_tea_route(tea_id):
     """Update an existing tea."""
@@ -366,6 +612,7 @@ def update_tea_route(tea_id):
             
         tea_id = ensure_string_id(tea_id)
         tea_data = request.json
+        use_drive = request.args.get('use_drive', 'false').lower() == 'true'
         
         # Validate required fields
         if not tea_data or 'name' not in tea_data:
@@ -377,13 +624,17 @@ def update_tea_route(tea_id):
         tea.updated = datetime.now().isoformat()
         
         # Update tea using the service
+        previous_tea = get_tea_by_id(tea_id)
         updated_tea = update_tea(tea_id, tea.to_dict())
         
         # Invalidate caches
-        cache_manager.invalidate('teas')
-        cache_manager.invalidate('dashboard')
+        current_tenant().cache.invalidate('teas')
+        current_tenant().cache.invalidate('dashboard')
         
         if updated_tea:
+            # Keep the tea name stored on its sessions in step with a rename
+            if previous_tea and previous_tea.get('name') != updated_tea['name']:
+                update_tea_sessions(tea_id, {'name': updated_tea['name']}, use_drive)
             return jsonify(updated_tea)
         
         return jsonify({"error": TEA_NOT_FOUND}), 404
@@ -398,43 +649,62 @@ def delete_tea_route(tea_id):
         return jsonify({"error": "Invalid tea ID"}), 400
         
     tea_id = ensure_string_id(tea_id)
+    use_drive = request.args.get('use_drive', 'false').lower() == 'true'
     success = delete_tea(tea_id)
     
     # Invalidate caches
-    cache_manager.invalidate('teas')
-    cache_manager.invalidate('dashboard')
+    current_tenant().cache.invalidate('teas')
+    current_tenant().cache.invalidate('dashboard')
     
     if success:
-        return jsonify({"message": "Tea deleted successfully"})
+        # Unlink the tea's sessions; they keep its name
+        unlinked = update_tea_sessions(tea_id, {'teaId': ''}, use_drive)
+        return jsonify({"message": "Tea deleted successfully", "sessionsUnlinked": unlinked})
     
     return jsonify({"error": TEA_NOT_FOUND}), 404
 
 @app.route('/api/dashboard', methods=['GET'])
 def get_dashboard_data():
-    """Get combined sessions and teas data for the dashboard view."""
+    """Get combined sessions and teas data for the dashboard view.
+
+    With lean=true only ids, names, timestamps and stats are returned, and
+    fields selects the fields of each session and tea.
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    lean = request.args.get('lean', 'false').lower() == 'true'
+    
+    def respond(dashboard_data):
+        return cached_json_response('dashboard', dashboard_data, (lean, fields),
+                                    lambda data: project_dashboard(data, fields, lean))
+    
     try:
         use_drive = request.args.get('use_drive', 'false').lower() == 'true'
         force_sync = request.args.get('force_sync', 'false').lower() == 'true'
+        cache = current_tenant().cache
         
         # Check cache first
         if not force_sync:
-            cached_dashboard = cache_manager.get('dashboard')
+            cached_dashboard = cache.get('dashboard')
             if cached_dashboard is not None:
-                return jsonify(cached_dashboard)
+                return respond(cached_dashboard)
         
         # Get sessions and teas
+        version = cache.current_version('dashboard')
         sessions = get_sessions_from_storage(use_drive, force_sync)
         teas = get_tea_collection()
         
+        # Sessions of each tea, newest first, from the reverse index
+        index = sessions.tea_index
+        
         # Calculate additional stats
         tea_stats = {}
         for tea in teas:
-            tea_id = str(tea['id'])
-            tea_sessions = [s for s in sessions if str(s.get('teaId')) == tea_id or 
-                           (not s.get('teaId') and s.get('name') == tea.get('name'))]
-            
-            # Sort sessions by timestamp (newest first)
-            tea_sessions.sort(key=lambda s: s.get('timestamp', ''), reverse=True)
+            tea_id = tea['id']
+            tea_sessions = index.sessions_of(tea_id)
             
             tea_stats[tea_id] = {
                 'sessionCount': len(tea_sessions),
@@ -456,9 +726,9 @@ def get_dashboard_data():
         }
         
         # Cache the dashboard data
-        cache_manager.set('dashboard', dashboard_data)
+        cache.set('dashboard', dashboard_data, version)
         
-        return jsonify(dashboard_data)
+        return respond(dashboard_data)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -472,24 +742,15 @@ def get_session_details(session_id):
             
         session_id = ensure_string_id(session_id)
         use_drive = request.args.get('use_drive', 'false').lower() == 'true'
-        sessions = get_sessions_from_storage(use_drive)
         
         # Find the session
-        session = None
-        for s in sessions:
-            if str(s.get('id')) == session_id:
-                session = s
-                break
+        session = find_session(session_id, use_drive)
         
         if not session:
             return jsonify({"error": "Session not found"}), 404
         
-        # Get the associated tea
-        tea = None
-        if session.get('teaId'):
-            tea = get_tea_by_id(session.get('teaId'))
-        elif session.get('name'):
-            tea = get_tea_by_name(session.get('name'))
+        # Get the associated tea; sessions of a deleted tea have an empty teaId
+        tea = get_tea_by_id(session['teaId']) if session.get('teaId') else None
         
         if not tea and session.get('name'):
             # Create a basic tea object from session data
@@ -498,7 +759,7 @@ def get_session_details(session_id):
                 'name': session.get('name'),
                 'type': session.get('type', ''),
                 'vendor': session.get('vendor', ''),
-                'year': session.get('age', '') or session.get('year', '')
+                'year': session.get('year', '')
             }
         
         return jsonify({
@@ -508,5 +769,80 @@ def get_session_details(session_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Stream change notifications as server-sent events.
+
+    Clients resume from the Last-Event-ID header (or last_event_id query
+    parameter) after reconnecting; a 'reset' event means they missed too much
+    and should refetch.
+    """
+    last_event_id = parse_last_event_id(
+        request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    tenant = current_tenant()
+    
+    return Response(stream_with_context(event_stream(tenant.events, tenant.stamp, last_event_id)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+BATCH_MAX_REQUESTS = 50
+
+def dispatch_sub_request(sub_request):
+    """Run one sub-request of a batch through the regular routes."""
+    if not isinstance(sub_request, dict):
+        return {"status": 400, "body": {"error": "Invalid sub-request"}}
+    
+    method = str(sub_request.get('method', 'GET')).upper()
+    url = urlsplit(str(sub_request.get('path', '')))
+    
+    if not url.path.startswith('/api/') or url.path.rstrip('/') == '/api/batch':
+        return {"id": sub_request.get('id'), "status": 400,
+                "body": {"error": "Invalid sub-request path"}}
+    
+    # Sub-requests act for the same user as the batch
+    headers = {USER_HEADER: request.headers[USER_HEADER]} if USER_HEADER in request.headers else {}
+    builder = EnvironBuilder(path=url.path, query_string=url.query, method=method,
+                             headers=headers, json=sub_request.get('body'))
+    try:
+        with app.request_context(builder.get_environ()):
+            response = app.full_dispatch_request()
+    finally:
+        builder.close()
+    
+    # Writes may have changed storage, so later sub-requests must reload it
+    if method != 'GET':
+        snapshot_clear()
+    
+    return {
+        "id": sub_request.get('id'),
+        "status": response.status_code,
+        "body": response.get_json(silent=True)
+    }
+
+@app.route('/api/batch', methods=['POST'])
+def batch_requests():
+    """Run several API requests in one round trip.
+
+    Expects {"requests": [{"id", "method", "path", "body"}, ...]} and returns
+    {"responses": [{"id", "status", "body"}, ...]} in the same order. Sub-requests
+    share one snapshot of the stored sessions and teas.
+    """
+    try:
+        data = request.json
+        sub_requests = data.get('requests') if isinstance(data, dict) else None
+        
+        if not isinstance(sub_requests, list):
+            return jsonify({"error": "A list of requests is required"}), 400
+        
+        if len(sub_requests) > BATCH_MAX_REQUESTS:
+            return jsonify({"error": f"At most {BATCH_MAX_REQUESTS} requests per batch"}), 400
+        
+        with snapshot_scope():
+            responses = [dispatch_sub_request(sub_request) for sub_request in sub_requests]
+        
+        return jsonify({"responses": responses})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
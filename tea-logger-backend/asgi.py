@@ -0,0 +1,216 @@
+# asgi.py
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import parse_qs
+
+from app import app
+from events import async_event_stream, parse_last_event_id
+from tenants import tenant_registry, parse_user_id, USER_HEADER
+
+# Bounded pool for the blocking file and Google Drive I/O done by the route handlers
+WORKER_THREADS = int(os.environ.get('TEA_LOGGER_WORKER_THREADS', '16'))
+
+executor = ThreadPoolExecutor(max_workers=WORKER_THREADS,
+                              thread_name_prefix='tea-logger-io')
+
+def build_environ(scope, body):
+    """Build a WSGI environ dictionary from an ASGI HTTP scope."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+
+        key = f'HTTP_{name}'
+        if key in environ:
+            value = f'{environ[key]},{value}'
+        environ[key] = value
+
+    return environ
+
+def call_wsgi_app(environ):
+    """Run the Flask app for one request and collect the full response."""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ]
+        return lambda data: None
+
+    result = app.wsgi_app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+
+    return response['status'], response['headers'], body
+
+async def read_body(receive):
+    """Read the full HTTP request body from the ASGI receive channel."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+    return b''.join(chunks)
+
+async def handle_lifespan(receive, send):
+    """Handle ASGI startup and shutdown events."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def stream_events(scope, receive, send):
+    """Serve the server-sent events stream on the event loop.
+
+    Idle subscribers only wait on an asyncio event, so they don't take a
+    thread from the executor.
+    """
+    headers = dict(scope.get('headers', []))
+    last_event_id = headers.get(b'last-event-id', b'').decode('latin-1')
+    if not last_event_id:
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        last_event_id = query.get('last_event_id', [None])[0]
+
+    try:
+        user_id = parse_user_id(headers.get(USER_HEADER.lower().encode('latin-1'),
+                                            b'').decode('latin-1'))
+    except ValueError as e:
+        await send({
+            'type': 'http.response.start',
+            'status': 400,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': json.dumps({"error": str(e)}).encode('utf-8'),
+        })
+        return
+
+    # Loading a tenant may run migrations, so keep it off the event loop
+    loop = asyncio.get_running_loop()
+    tenant = await loop.run_in_executor(executor, tenant_registry.acquire, user_id)
+    try:
+        await send_event_stream(tenant, last_event_id, receive, send)
+    finally:
+        tenant_registry.release(tenant)
+
+async def send_event_stream(tenant, last_event_id, receive, send):
+    """Send a tenant's change notifications until the client disconnects."""
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+            (b'access-control-allow-origin', b'*'),
+        ],
+    })
+
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    disconnected = asyncio.ensure_future(wait_for_disconnect())
+    stream = async_event_stream(tenant.events, tenant.stamp, parse_last_event_id(last_event_id))
+    try:
+        while not disconnected.done():
+            next_chunk = asyncio.ensure_future(stream.__anext__())
+            await asyncio.wait({next_chunk, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_chunk.done():
+                next_chunk.cancel()
+                await asyncio.gather(next_chunk, return_exceptions=True)
+                break
+
+            chunk = next_chunk.result()
+            if chunk:
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk.encode('utf-8'),
+                    'more_body': True,
+                })
+    finally:
+        disconnected.cancel()
+        await stream.aclose()
+
+async def application(scope, receive, send):
+    """ASGI entry point serving the Flask routes without blocking the event loop.
+
+    Each request is handed to the bounded executor, so a slow Google Drive
+    call only occupies one worker thread while the event loop keeps accepting
+    and answering other clients.
+    """
+    if scope['type'] == 'lifespan':
+        await handle_lifespan(receive, send)
+        return
+
+    if scope['type'] != 'http':
+        raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    if scope['path'] == '/api/events' and scope['method'] == 'GET':
+        await stream_events(scope, receive, send)
+        return
+
+    body = await read_body(receive)
+    environ = build_environ(scope, body)
+
+    loop = asyncio.get_running_loop()
+    status, headers, content = await loop.run_in_executor(executor, call_wsgi_app, environ)
+
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers,
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': content,
+    })
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('asgi:application', port=5000)
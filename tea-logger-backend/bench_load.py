@@ -0,0 +1,368 @@
+# bench_load.py
+"""Drive the API with concurrent clients and report throughput and latency percentiles.
+
+Runs in process against the WSGI app, where Google Drive is replaced by a fake
+with injectable latency and failures, or against a running server with --url.
+In process, every user's data directory and fake Drive start out with the same
+seeded history.
+
+Usage: python bench_load.py [--clients 20] [--duration 10] [--url http://127.0.0.1:5000]
+                            [--mix list_sessions=40,create_session=10,...]
+                            [--use-drive] [--drive-latency 0.2] [--drive-failure-rate 0.1]
+"""
+import argparse
+import atexit
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from bench_serving import seed_data, percentile
+from file_store import read_json
+from sync_provider import SyncProvider
+
+# Relative weights of the operations run by each client
+DEFAULT_MIX = {
+    'list_sessions': 30,
+    'dashboard': 20,
+    'list_teas': 15,
+    'create_session': 15,
+    'update_session': 10,
+    'delete_session': 5,
+    'create_tea': 3,
+    'update_tea': 1,
+    'delete_tea': 1,
+}
+
+class FakeDrive(SyncProvider):
+    """In-memory stand-in for Google Drive with configurable latency and failures."""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None, sessions=None):
+        """Initialize a fake Drive holding the given sessions."""
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sessions = json.loads(json.dumps(sessions or []))
+        self.calls = 0
+        self.failures = 0
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def _call(self):
+        """Wait for the injected latency and fail at the injected rate."""
+        time.sleep(self.latency)
+        with self.lock:
+            self.calls += 1
+            failed = self.random.random() < self.failure_rate
+            self.failures += failed
+        if failed:
+            raise ConnectionError("Injected Google Drive failure")
+
+    def load_sessions(self):
+        """Return a copy of the stored sessions."""
+        self._call()
+        with self.lock:
+            return json.loads(json.dumps(self.sessions))
+
+    def save_sessions(self, sessions):
+        """Replace the stored sessions."""
+        self._call()
+        with self.lock:
+            self.sessions = json.loads(json.dumps(sessions))
+        return True
+
+class HttpTransport:
+    """Sends requests to a running server."""
+
+    def __init__(self, base_url, headers=None):
+        """Initialize the transport for a base URL such as http://127.0.0.1:5000."""
+        self.base_url = base_url.rstrip('/')
+        self.headers = headers or {}
+
+    def request(self, method, path, body=None):
+        """Send a request and return the status code and decoded JSON body."""
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = dict(self.headers, **({'Content-Type': 'application/json'} if data else {}))
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+class WsgiTransport:
+    """Calls the Flask app in process, with one test client per thread."""
+
+    def __init__(self, app, headers=None):
+        """Initialize the transport for a Flask app."""
+        self.app = app
+        self.headers = headers or {}
+        self.local = threading.local()
+
+    def request(self, method, path, body=None):
+        """Dispatch a request and return the status code and decoded JSON body."""
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=self.headers)
+        return response.status_code, response.get_json(silent=True)
+
+class LoadClient:
+    """One simulated user running a random mix of operations."""
+
+    def __init__(self, transport, mix, query, seed):
+        """Initialize the client with its transport, operation weights and query string."""
+        self.transport = transport
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.query = query
+        self.random = random.Random(seed)
+        self.session_ids = []
+        self.tea_ids = []
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, operation, method, path, body=None):
+        """Time one request and record its latency under the operation name."""
+        separator = '&' if '?' in path else '?'
+        start = time.perf_counter()
+        try:
+            status, data = self.transport.request(method, f'{path}{separator}{self.query}', body)
+        except Exception:
+            status, data = None, None
+        self.latencies[operation].append(time.perf_counter() - start)
+        if status is None or status >= 400:
+            self.errors[operation] += 1
+            return None
+        return data
+
+    def create_session(self):
+        """Log a new session."""
+        session = self.call('create_session', 'POST', '/api/sessions', {
+            'name': f'Load Tea {self.random.randrange(40)}',
+            'notes': 'Load test notes ' * 10,
+            'rating': self.random.randint(1, 5)
+        })
+        if session:
+            self.session_ids.append(session['id'])
+
+    def update_session(self):
+        """Update one of the sessions this client created."""
+        if not self.session_ids:
+            return self.create_session()
+        session_id = self.random.choice(self.session_ids)
+        self.call('update_session', 'PUT', f'/api/sessions/{session_id}',
+                  {'notes': f'Updated {time.time()}'})
+
+    def delete_session(self):
+        """Delete one of the sessions this client created."""
+        if not self.session_ids:
+            return self.create_session()
+        session_id = self.session_ids.pop(self.random.randrange(len(self.session_ids)))
+        self.call('delete_session', 'DELETE', f'/api/sessions/{session_id}')
+
+    def create_tea(self):
+        """Add a new tea."""
+        tea = self.call('create_tea', 'POST', '/api/teas', {
+            'name': f'Load Tea {self.random.random():.12f}',
+            'type': 'Oolong',
+            'vendor': 'Vendor'
+        })
+        if tea:
+            self.tea_ids.append(tea['id'])
+
+    def update_tea(self):
+        """Rename one of the teas this client created."""
+        if not self.tea_ids:
+            return self.create_tea()
+        tea_id = self.random.choice(self.tea_ids)
+        self.call('update_tea', 'PUT', f'/api/teas/{tea_id}',
+                  {'name': f'Load Tea {self.random.random():.12f}', 'vendor': 'Vendor'})
+
+    def delete_tea(self):
+        """Delete one of the teas this client created."""
+        if not self.tea_ids:
+            return self.create_tea()
+        tea_id = self.tea_ids.pop(self.random.randrange(len(self.tea_ids)))
+        self.call('delete_tea', 'DELETE', f'/api/teas/{tea_id}')
+
+    def list_sessions(self):
+        """Fetch all sessions."""
+        self.call('list_sessions', 'GET', '/api/sessions')
+
+    def list_teas(self):
+        """Fetch all teas."""
+        self.call('list_teas', 'GET', '/api/teas')
+
+    def dashboard(self):
+        """Fetch the dashboard data."""
+        self.call('dashboard', 'GET', '/api/dashboard')
+
+    def run(self, deadline):
+        """Run randomly chosen operations until the deadline."""
+        while time.perf_counter() < deadline:
+            operation = self.random.choices(self.operations, self.weights)[0]
+            getattr(self, operation)()
+        return self
+
+def parse_mix(value):
+    """Parse operation weights given as name=weight pairs separated by commas."""
+    mix = {}
+    for pair in value.split(','):
+        name, _, weight = pair.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(
+                f"Unknown operation '{name}', expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def install_fake_drive(make_drive):
+    """Give every tenant of the in-process app its own fake Drive.
+
+    make_drive is called with each tenant once its data files are migrated.
+    """
+    from tenants import tenant_registry
+
+    def use_fake_drive(tenant):
+        drive = make_drive(tenant)
+        tenant.drive_sync = drive
+        tenant.drive_outbox.provider = drive
+
+    setup = tenant_registry.setup
+
+    @tenant_registry.on_load
+    def setup_with_fake_drive(tenant):
+        if setup:
+            setup(tenant)
+        use_fake_drive(tenant)
+
+    use_fake_drive(tenant_registry.get())
+
+def run_load(transport, args):
+    """Run all clients for the configured duration and return them with the elapsed time."""
+    query = f"use_drive={'true' if args.use_drive else 'false'}"
+    clients = [LoadClient(transport(i), args.mix, query, args.seed + i)
+               for i in range(args.clients)]
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        list(pool.map(lambda client: client.run(deadline), clients))
+    return clients, time.perf_counter() - start
+
+def summarize(clients, elapsed):
+    """Combine the latencies of all clients into per-operation and total statistics."""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    for client in clients:
+        for operation, values in client.latencies.items():
+            latencies[operation].extend(values)
+        for operation, count in client.errors.items():
+            errors[operation] += count
+
+    def stats(values, error_count):
+        values = sorted(values)
+        return {
+            'requests': len(values),
+            'errors': error_count,
+            'throughput': len(values) / elapsed,
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'max_ms': values[-1] * 1000,
+        }
+
+    operations = {operation: stats(values, errors[operation])
+                  for operation, values in sorted(latencies.items())}
+    all_latencies = [value for values in latencies.values() for value in values]
+    total = stats(all_latencies, sum(errors.values())) if all_latencies else None
+    return {'elapsed': elapsed, 'operations': operations, 'total': total}
+
+def print_report(summary):
+    """Print the per-operation statistics as a table."""
+    print(f"{'operation':<16}{'requests':>9}{'errors':>8}{'req/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+
+    rows = list(summary['operations'].items())
+    if summary['total']:
+        rows.append(('total', summary['total']))
+    for name, row in rows:
+        print(f"{name:<16}{row['requests']:>9}{row['errors']:>8}{row['throughput']:>9.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+              f"{row['max_ms']:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=10, help='seconds to run')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='operation weights, e.g. list_sessions=40,create_session=10')
+    parser.add_argument('--url', help='base URL of a running server; runs in process if omitted')
+    parser.add_argument('--users', type=int, default=0,
+                        help='spread clients over this many users via the X-Tea-User header')
+    parser.add_argument('--sessions', type=int, default=2000,
+                        help='sessions to seed the in-process data directory with')
+    parser.add_argument('--use-drive', action='store_true', help='send use_drive=true')
+    parser.add_argument('--drive-latency', type=float, default=0.2,
+                        help='seconds each fake Google Drive call takes')
+    parser.add_argument('--drive-failure-rate', type=float, default=0.0,
+                        help='fraction of fake Google Drive calls that fail')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    def headers_for(i):
+        return {'X-Tea-User': f'load-{i % args.users}'} if args.users else {}
+
+    drives = []
+    if args.url:
+        transport = lambda i: HttpTransport(args.url, headers_for(i))
+    else:
+        # The app reads its data files from the working directory on import. The
+        # directory is removed after the app's own exit handlers, which run first.
+        data_dir = tempfile.mkdtemp(prefix='tea-logger-load-')
+        atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+        os.chdir(data_dir)
+        from tenants import USERS_DIR
+        seed_data(data_dir, args.sessions)
+        for i in range(args.users):
+            user_dir = os.path.join(USERS_DIR, f'load-{i}')
+            os.makedirs(user_dir)
+            seed_data(user_dir, args.sessions)
+        from app import app
+
+        def make_drive(tenant):
+            # Drive starts with the tenant's history, so Drive reads don't replace it
+            drive = FakeDrive(args.drive_latency, args.drive_failure_rate,
+                              args.seed + len(drives), read_json(tenant.sessions_file, []))
+            drives.append(drive)
+            return drive
+
+        install_fake_drive(make_drive)
+        transport = lambda i: WsgiTransport(app, headers_for(i))
+
+    clients, elapsed = run_load(transport, args)
+    summary = summarize(clients, elapsed)
+    if drives:
+        summary['fake_drive'] = {'calls': sum(drive.calls for drive in drives),
+                                 'failures': sum(drive.failures for drive in drives)}
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"{args.clients} clients for {elapsed:.1f}s against "
+              f"{args.url or 'the in-process app'}")
+        print_report(summary)
+        if drives:
+            print(f"fake Google Drive: {summary['fake_drive']['calls']} calls, "
+                  f"{summary['fake_drive']['failures']} failed")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# bench_serving.py
+"""Compare the Flask development server with the ASGI entry point under concurrent polling.
+
+Usage: python bench_serving.py [--clients 50] [--requests 20]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SERVER_COMMANDS = {
+    'flask': [sys.executable, '-c',
+              'import sys; from app import app; app.run(port=int(sys.argv[1]), threaded=True)'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:application', '--log-level', 'warning',
+             '--port'],
+}
+
+POLLED_PATHS = ['/api/sessions', '/api/dashboard', '/api/sync/status']
+
+def seed_data(data_dir, session_count):
+    """Write a sessions file so the benchmark reads a realistic history."""
+    sessions = [{
+        'id': str(1600000000000 + i),
+        'teaId': '',
+        'name': f'Tea {i % 40}',
+        'type': 'Oolong',
+        'vendor': 'Vendor',
+        'year': '2020',
+        'notes': 'Notes ' * 20,
+        'timestamp': f'2024-01-01T00:{i % 60:02d}:00',
+        'created': '2024-01-01T00:00:00',
+        'updated': None
+    } for i in range(session_count)]
+
+    with open(os.path.join(data_dir, 'tea_sessions.json'), 'w') as f:
+        json.dump(sessions, f)
+
+def wait_for_server(base_url, timeout=15):
+    """Wait until the server answers the sync status endpoint."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + '/api/sync/status', timeout=1).read()
+            return
+        except Exception:
+            time.sleep(0.1)
+    raise RuntimeError(f'Server at {base_url} did not start')
+
+def run_client(base_url, request_count):
+    """Poll the API sequentially and return per-request latencies."""
+    latencies = []
+    for i in range(request_count):
+        path = POLLED_PATHS[i % len(POLLED_PATHS)]
+        start = time.perf_counter()
+        urllib.request.urlopen(base_url + path, timeout=30).read()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def percentile(values, pct):
+    """Return the given percentile of a sorted list of values."""
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+def bench_mode(mode, port, data_dir, clients, requests_per_client):
+    """Start a server in the given mode and drive it with concurrent clients."""
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    server = subprocess.Popen(SERVER_COMMANDS[mode] + [str(port)], cwd=data_dir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+
+    try:
+        wait_for_server(base_url)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(lambda _: run_client(base_url, requests_per_client),
+                                    range(clients)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(latency for result in results for latency in result)
+    return {
+        'mode': mode,
+        'requests': len(latencies),
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'max_ms': latencies[-1] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=5600)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='tea-logger-bench-')
+    try:
+        seed_data(data_dir, args.sessions)
+        for offset, mode in enumerate(SERVER_COMMANDS):
+            result = bench_mode(mode, args.port + offset, data_dir, args.clients, args.requests)
+            print(f"{result['mode']:>6}: {result['requests']} requests, "
+                  f"{result['throughput']:.1f} req/s, "
+                  f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+                  f"max {result['max_ms']:.1f} ms")
+    finally:
+        shutil.rmtree(data_dir)
+
+if __name__ == '__main__':
+    main()
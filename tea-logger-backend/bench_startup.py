@@ -0,0 +1,77 @@
+# bench_startup.py
+"""Measure backend import time and memory with and without the Google Drive client.
+
+Usage: python bench_startup.py [--runs 5]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Imports as done by a local-only worker, and with Drive support loaded eagerly
+VARIANTS = {
+    'local-only': 'import app',
+    'with-drive': 'import app, drive_service',
+}
+
+PROBE = '''
+import resource, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+google_loaded = any(name.startswith(('google', 'googleapiclient')) for name in sys.modules)
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed, rss_kb, google_loaded)
+'''
+
+def run_python(args, data_dir):
+    """Run a Python subprocess in the data directory with the backend importable."""
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    return subprocess.run([sys.executable] + args, cwd=data_dir, env=env,
+                          capture_output=True, text=True, check=True)
+
+def measure(statement, data_dir, runs):
+    """Return median import time, median peak RSS and whether Google modules loaded."""
+    times, rss_values, google_loaded = [], [], False
+    for _ in range(runs):
+        output = run_python(['-c', PROBE.format(statement=statement)], data_dir).stdout
+        elapsed, rss_kb, loaded = output.split()[-3:]
+        times.append(float(elapsed))
+        rss_values.append(int(rss_kb))
+        google_loaded = loaded == 'True'
+    return statistics.median(times), statistics.median(rss_values), google_loaded
+
+def slowest_imports(statement, data_dir, count=5):
+    """Return the modules with the highest cumulative time from -X importtime."""
+    stderr = run_python(['-X', 'importtime', '-c', statement], data_dir).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative), name.strip()))
+    return sorted(entries, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='tea-logger-startup-')
+    try:
+        for variant, statement in VARIANTS.items():
+            elapsed, rss_kb, google_loaded = measure(statement, data_dir, args.runs)
+            print(f"{variant:>10}: import {elapsed * 1000:.1f} ms, "
+                  f"peak RSS {rss_kb / 1024:.1f} MB, Google modules loaded: {google_loaded}")
+            for cumulative, name in slowest_imports(statement, data_dir):
+                print(f"{'':>12}{cumulative / 1000:8.1f} ms  {name}")
+    finally:
+        shutil.rmtree(data_dir)
+
+if __name__ == '__main__':
+    main()
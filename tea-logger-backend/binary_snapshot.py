@@ -0,0 +1,187 @@
+# binary_snapshot.py
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+from file_store import file_lock, read_json
+
+# File layout (little-endian):
+#   header
+#   index:   one fixed-width entry per record, sorted by id
+#   recent:  u32 index positions ordered by timestamp, newest first
+#   strings: UTF-8 ids and timestamps referenced by the index
+#   records: JSON encoding of each record, decoded only when requested
+MAGIC = b'TLSN'
+FORMAT_VERSION = 1
+
+# magic, format version, record count, source inode, source mtime (ns), source size,
+# and the offsets of the index, recent, strings and records sections
+HEADER = struct.Struct('<4sHxxIQqqIIII')
+
+# id offset/length, timestamp offset/length and record offset/length
+INDEX_ENTRY = struct.Struct('<6I')
+
+RECENT_ENTRY = struct.Struct('<I')
+
+def snapshot_path_for(json_path):
+    """Get the snapshot file stored alongside a JSON data file."""
+    return os.path.splitext(json_path)[0] + '.snap'
+
+def source_signature(json_path):
+    """Identify the current version of a JSON file by inode, mtime and size."""
+    stat = os.stat(json_path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+def write_snapshot(json_path, records=None):
+    """Write a binary snapshot of the records stored in a JSON file.
+
+    Records passed in must match the file's current contents, since the
+    file's signature is stored to detect when the snapshot becomes stale.
+    Without records, the file is read under its lock.
+    """
+    with file_lock(json_path):
+        if not os.path.exists(json_path):
+            return False
+        signature = source_signature(json_path)
+        if records is None:
+            records = read_json(json_path, [])
+
+        ids = [str(record.get('id')).encode('utf-8') for record in records]
+        order = sorted(range(len(records)), key=lambda i: ids[i])
+
+        strings = bytearray()
+        blobs = bytearray()
+        index = bytearray()
+        timestamps = []
+
+        for i in order:
+            timestamp = str(records[i].get('timestamp') or '').encode('utf-8')
+            record = json.dumps(records[i]).encode('utf-8')
+
+            index += INDEX_ENTRY.pack(len(strings), len(ids[i]),
+                                      len(strings) + len(ids[i]), len(timestamp),
+                                      len(blobs), len(record))
+            strings += ids[i] + timestamp
+            blobs += record
+            timestamps.append(timestamp)
+
+        recent = sorted(range(len(order)), key=lambda position: timestamps[position],
+                        reverse=True)
+        recent_section = b''.join(RECENT_ENTRY.pack(position) for position in recent)
+
+        index_offset = HEADER.size
+        recent_offset = index_offset + len(index)
+        strings_offset = recent_offset + len(recent_section)
+        records_offset = strings_offset + len(strings)
+
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, len(records), *signature,
+                             index_offset, recent_offset, strings_offset, records_offset)
+
+        snapshot_path = snapshot_path_for(json_path)
+        tmp_path = f'{snapshot_path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(header + index + recent_section + strings + blobs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, snapshot_path)
+        return True
+
+class RecordSnapshot:
+    """Read-only, memory-mapped view of a binary snapshot.
+
+    Answers id lookups and newest-first queries straight from the mapped
+    file, and is only used while the JSON file it was built from is unchanged.
+    """
+
+    def __init__(self, json_path):
+        """Initialize the snapshot; the file is mapped on first use."""
+        self.json_path = json_path
+        self.snapshot_path = snapshot_path_for(json_path)
+        self._view = None
+        self._snapshot_inode = None
+        self._open_lock = threading.Lock()
+
+    def _open(self):
+        """Map the snapshot file if it exists and has a valid header."""
+        with self._open_lock:
+            try:
+                inode = os.stat(self.snapshot_path).st_ino
+                if self._view is not None and inode == self._snapshot_inode:
+                    return
+                with open(self.snapshot_path, 'rb') as f:
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return
+
+            header = HEADER.unpack_from(buffer, 0) if len(buffer) >= HEADER.size else None
+            if not header or header[0] != MAGIC or header[1] != FORMAT_VERSION:
+                buffer.close()
+                return
+
+            # Readers may still hold the previous view, so leave closing it to the GC
+            self._view = _SnapshotView(header, buffer)
+            self._snapshot_inode = inode
+
+    def current_view(self):
+        """Get the mapped snapshot if it matches the JSON file on disk, else None."""
+        try:
+            signature = source_signature(self.json_path)
+        except OSError:
+            return None
+
+        if self._view is None or self._view.signature != signature:
+            # A newer snapshot may have been written since it was mapped
+            self._open()
+
+        view = self._view
+        if view is not None and view.signature == signature:
+            return view
+        return None
+
+class _SnapshotView:
+    """One mapped snapshot file with its parsed header."""
+
+    def __init__(self, header, buffer):
+        """Initialize the view from a parsed header and the mapped buffer."""
+        self.count = header[2]
+        self.signature = tuple(header[3:6])
+        self.index_offset, self.recent_offset, self.strings_offset, self.records_offset = header[6:10]
+        self.buffer = buffer
+
+    def _entry(self, position):
+        """Read the index entry at a position."""
+        return INDEX_ENTRY.unpack_from(self.buffer, self.index_offset + position * INDEX_ENTRY.size)
+
+    def _record(self, entry):
+        """Decode the full record for an index entry."""
+        start = self.records_offset + entry[4]
+        return json.loads(self.buffer[start:start + entry[5]])
+
+    def __len__(self):
+        """Number of records, so the view can be bisected by id."""
+        return self.count
+
+    def __getitem__(self, position):
+        """Read the id of the record at an index position."""
+        entry = self._entry(position)
+        start = self.strings_offset + entry[0]
+        return self.buffer[start:start + entry[1]]
+
+    def get(self, record_id):
+        """Look up a record by id with a binary search over the index."""
+        key = str(record_id).encode('utf-8')
+        position = bisect.bisect_left(self, key)
+        if position < self.count and self[position] == key:
+            return self._record(self._entry(position))
+        return None
+
+    def recent(self, limit):
+        """Return up to limit records, newest timestamp first."""
+        records = []
+        for i in range(min(limit, self.count)):
+            offset = self.recent_offset + i * RECENT_ENTRY.size
+            position = RECENT_ENTRY.unpack_from(self.buffer, offset)[0]
+            records.append(self._record(self._entry(position)))
+        return records
@@ -1,30 +1,48 @@
 # cache_middleware.py
 import time
 from functools import wraps
+from file_store import version_stamp
+
+# Serializations kept per cached resource, one for each field set requested
+MAX_ENCODED_VARIANTS = 16
 
 class CacheManager:
     """Manages caching for different resource types with configurable TTL."""
     
-    def __init__(self):
-        """Initialize the cache manager."""
+    def __init__(self, stamp=None):
+        """Initialize the cache manager.
+
+        If a shared version stamp is given, cached entries are also dropped
+        when another worker process has written one of their resources.
+        """
+        self.stamp = stamp
         self.caches = {
             'sessions': {
                 'data': None,
                 'last_sync': 0,
                 'ttl': 60,  # Default TTL for sessions (60 seconds)
-                'dirty': False  # Flag to indicate if cache needs updating
+                'dirty': False,  # Flag to indicate if cache needs updating
+                'depends_on': ['sessions'],  # Shared versions the data is built from
+                'version': None,
+                'encoded': {}  # Serialized responses keyed by field set
             },
             'teas': {
                 'data': None,
                 'last_sync': 0,
                 'ttl': 300,  # Default TTL for teas (5 minutes)
-                'dirty': False
+                'dirty': False,
+                'depends_on': ['teas'],
+                'version': None,
+                'encoded': {}
             },
             'dashboard': {
                 'data': None,
                 'last_sync': 0,
                 'ttl': 120,  # Default TTL for dashboard (2 minutes)
-                'dirty': False
+                'dirty': False,
+                'depends_on': ['sessions', 'teas'],
+                'version': None,
+                'encoded': {}
             }
         }
     
@@ -40,20 +58,51 @@ class CacheManager:
         if (cache['data'] is not None and 
             not force_refresh and 
             not cache['dirty'] and
-            (current_time - cache['last_sync']) < cache['ttl']):
+            (current_time - cache['last_sync']) < cache['ttl'] and
+            cache['version'] == self.current_version(resource_type)):
             return cache['data']
             
         return None
     
-    def set(self, resource_type, data):
-        """Set data in cache and update last sync time."""
+    def current_version(self, resource_type):
+        """Get the shared version of the resources a cache depends on."""
+        cache = self.caches.get(resource_type)
+        if not cache or not self.stamp:
+            return None
+            
+        return tuple(self.stamp.get(name) for name in cache['depends_on'])
+    
+    def set(self, resource_type, data, version=None):
+        """Set data in cache and update last sync time.
+
+        Pass the version read before loading the data, so a write that lands
+        in between makes the entry stale instead of being missed.
+        """
         cache = self.caches.get(resource_type)
         if not cache:
             return
             
+        cache['encoded'] = {}
         cache['data'] = data
         cache['last_sync'] = time.time()
         cache['dirty'] = False
+        cache['version'] = version if version is not None else self.current_version(resource_type)
+    
+    def encodings(self, resource_type, data):
+        """Get the serializations cached for data, keyed by field set.
+
+        Returns an empty throwaway dict unless data is the cached copy. Setting
+        new data replaces the dict, so encodings built from older data are
+        never stored alongside it.
+        """
+        cache = self.caches.get(resource_type)
+        if not cache:
+            return {}
+            
+        encoded = cache['encoded']
+        if cache['data'] is not data:
+            return {}
+        return encoded
     
     def invalidate(self, resource_type):
         """Mark cache as dirty (needs refresh)."""
@@ -72,7 +121,7 @@ class CacheManager:
         cache['ttl'] = ttl
 
 # Create a global instance of the cache manager
-cache_manager = CacheManager()
+cache_manager = CacheManager(version_stamp)
 
 def cached_endpoint(resource_type):
     """Decorator to cache API endpoint results."""
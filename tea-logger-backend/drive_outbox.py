@@ -0,0 +1,281 @@
+# drive_outbox.py
+import os
+import threading
+import time
+from file_store import file_lock, read_json, write_json_atomic
+
+# File holding Google Drive operations that haven't been applied yet
+OUTBOX_FILE = 'drive_outbox.json'
+
+# Consecutive failures after which Drive calls are skipped for the cooldown
+FAILURE_THRESHOLD = int(os.environ.get('TEA_LOGGER_DRIVE_FAILURE_THRESHOLD', '3'))
+COOLDOWN_SECONDS = float(os.environ.get('TEA_LOGGER_DRIVE_COOLDOWN', '60'))
+
+# Sustained Drive calls per second, and how many may be made in a burst
+RATE_LIMIT = float(os.environ.get('TEA_LOGGER_DRIVE_RATE', '2'))
+RATE_BURST = int(os.environ.get('TEA_LOGGER_DRIVE_BURST', '5'))
+
+# Seconds between attempts to drain the outbox in the background
+DRAIN_INTERVAL = 5
+
+class DriveUnavailable(Exception):
+    """Raised when a Drive call is skipped by the circuit breaker or rate limiter."""
+
+class CircuitBreaker:
+    """Stops calling a failing service until a cooldown has passed.
+
+    After the cooldown a single trial call is let through; its outcome
+    closes the circuit again or restarts the cooldown.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN_SECONDS):
+        """Initialize a closed circuit breaker."""
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Current state: 'closed', 'open' or 'half-open'."""
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return 'open'
+        return 'half-open'
+
+    def retry_after(self):
+        """Seconds until the next trial call is allowed."""
+        if self.opened_at is None:
+            return 0
+        return max(0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def allow(self):
+        """Whether a call may be made now."""
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def cancel(self):
+        """Give back the trial slot of an allowed call that was not made."""
+        with self.lock:
+            self.trial_running = False
+
+    def record_success(self):
+        """Close the circuit after a successful call."""
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        """Count a failed call, opening the circuit once the threshold is reached."""
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class TokenBucket:
+    """Rate limiter allowing bursts up to the capacity at a sustained rate."""
+
+    def __init__(self, rate=RATE_LIMIT, capacity=RATE_BURST):
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token if one is available."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class DriveOutbox:
+    """Durable queue of Google Drive operations, drained in the background.
+
+    Writes are recorded on disk and pushed to Drive by a background thread
+    that runs until the queue is empty, so requests never wait on Drive.
+    Every Drive call goes through the circuit breaker and rate limiter, and
+    the queue drains automatically once Drive recovers.
+    """
+
+    def __init__(self, provider, sessions_file, path=OUTBOX_FILE,
+                 breaker=None, limiter=None, drain_interval=DRAIN_INTERVAL):
+        """Initialize the outbox for a sync provider and the local sessions file."""
+        self.provider = provider
+        self.sessions_file = sessions_file
+        self.path = path
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or TokenBucket()
+        self.drain_interval = drain_interval
+        self.wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def call(self, function, *args):
+        """Call Drive through the circuit breaker and rate limiter.
+
+        The breaker is asked first so calls it rejects don't use up tokens.
+        """
+        if not self.breaker.allow():
+            raise DriveUnavailable(
+                f"Google Drive unavailable, retrying in {self.breaker.retry_after():.0f}s")
+        if not self.limiter.try_acquire():
+            self.breaker.cancel()
+            raise DriveUnavailable("Google Drive rate limit reached")
+
+        try:
+            result = function(*args)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        return result
+
+    def pending(self):
+        """Get the queued operations."""
+        return read_json(self.path, [])
+
+    def enqueue_save_sessions(self):
+        """Record that the local sessions need to be pushed to Drive.
+
+        Saving replaces the whole Drive file, so a save already in the queue
+        covers this one as well; its revision is bumped so a push that is
+        already running doesn't clear it.
+        """
+        with file_lock(self.path):
+            operations = self.pending()
+            queued = next((op for op in operations if op['op'] == 'save_sessions'), None)
+            if queued:
+                queued['revision'] += 1
+            else:
+                operations.append({
+                    'op': 'save_sessions',
+                    'revision': 1,
+                    'queued_at': time.time(),
+                    'attempts': 0,
+                    'last_error': None
+                })
+            write_json_atomic(self.path, operations)
+
+        self.start()
+        self.wakeup.set()
+
+    def drain(self):
+        """Apply queued operations in order until the queue is empty or Drive fails.
+
+        The queue is only locked while it is read or updated, never during a
+        Drive call, so writes can keep queueing operations. Returns True if
+        the queue is empty afterwards.
+        """
+        # Only one thread across all workers pushes to Drive at a time
+        with file_lock(f'{self.path}.drain'):
+            while True:
+                operations = self.pending()
+                if not operations:
+                    return True
+
+                operation = operations[0]
+                try:
+                    self._apply(operation)
+                except DriveUnavailable:
+                    return False
+                except Exception as e:
+                    print(f"Error syncing with Google Drive: {e}")
+                    self._update_head(operation, lambda op: op.update(
+                        attempts=op['attempts'] + 1, last_error=str(e)))
+                    return False
+
+                self._remove_head(operation)
+
+    def _update_head(self, operation, update):
+        """Apply an update to the first queued operation if it is still the given one."""
+        with file_lock(self.path):
+            operations = self.pending()
+            if operations and operations[0]['op'] == operation['op']:
+                update(operations[0])
+                write_json_atomic(self.path, operations)
+
+    def _remove_head(self, operation):
+        """Remove the first queued operation unless it was queued again while running."""
+        with file_lock(self.path):
+            operations = self.pending()
+            if (operations and operations[0]['op'] == operation['op'] and
+                    operations[0]['revision'] == operation['revision']):
+                operations.pop(0)
+                write_json_atomic(self.path, operations)
+
+    def _apply(self, operation):
+        """Run one queued operation against Drive."""
+        if operation['op'] == 'save_sessions':
+            with file_lock(self.sessions_file):
+                sessions = read_json(self.sessions_file, [])
+            self.call(self.provider.save_sessions, sessions)
+        else:
+            raise ValueError(f"Unknown outbox operation: {operation['op']}")
+
+    def status(self):
+        """Summarize the outbox and circuit state for the sync status endpoint."""
+        operations = self.pending()
+        return {
+            'pending': len(operations),
+            'oldest_queued_at': operations[0]['queued_at'] if operations else None,
+            'last_error': operations[0]['last_error'] if operations else None,
+            'circuit': self.breaker.state,
+            'retry_after': self.breaker.retry_after()
+        }
+
+    @property
+    def active(self):
+        """Whether the background drain thread is running."""
+        return self._thread is not None and self._pid == os.getpid()
+
+    def start(self):
+        """Start the background drain thread, including after a fork into a new worker.
+
+        Always checked under the lock: an exiting thread clears itself under
+        the same lock after seeing an empty queue, so an operation queued
+        meanwhile either keeps that thread running or starts a new one.
+        """
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self.wakeup = threading.Event()
+                self._thread = threading.Thread(target=self._run, name='drive-outbox',
+                                                daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Drain the outbox periodically until it is empty, then let the thread exit."""
+        while True:
+            self.wakeup.wait(self.drain_interval)
+            self.wakeup.clear()
+            try:
+                drained = self.drain()
+            except Exception as e:
+                print(f"Error draining Google Drive outbox: {e}")
+                continue
+
+            if drained:
+                with self._start_lock:
+                    # The next write starts a new thread once this one is gone
+                    if not self.pending():
+                        self._thread = None
+                        return
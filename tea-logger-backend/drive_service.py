@@ -13,14 +13,14 @@ CREDENTIALS_FILE = 'credentials.json'
 TOKEN_FILE = 'token.json'
 TEA_SESSIONS_FILE_NAME = 'tea_sessions.json'
 
-def get_drive_service():
+def get_drive_service(token_file=TOKEN_FILE):
     """Get authenticated Google Drive service."""
     creds = None
     
     # Load saved credentials if they exist
-    if os.path.exists(TOKEN_FILE):
+    if os.path.exists(token_file):
         creds = Credentials.from_authorized_user_info(
-            json.loads(open(TOKEN_FILE).read()), SCOPES)
+            json.loads(open(token_file).read()), SCOPES)
             
     # If credentials are invalid or don't exist, authenticate
     if not creds or not creds.valid:
@@ -32,7 +32,7 @@ def get_drive_service():
             creds = flow.run_local_server(port=8080)
             
         # Save credentials
-        with open(TOKEN_FILE, 'w') as token:
+        with open(token_file, 'w') as token:
             token.write(creds.to_json())
             
     return build('drive', 'v3', credentials=creds)
@@ -67,42 +67,41 @@ def find_or_create_tea_sessions_file(service):
     
     return files[0]['id']
 
-def save_sessions_to_drive(sessions):
-    """Save tea sessions to Google Drive."""
-    try:
-        service = get_drive_service()
-        file_id = find_or_create_tea_sessions_file(service)
-        
-        # Convert sessions to JSON string
-        content = json.dumps(sessions)
-        file_content = io.BytesIO(content.encode('utf-8'))
-        media = MediaIoBaseUpload(file_content, mimetype='application/json')
-        
-        # Update file content
-        service.files().update(
-            fileId=file_id,
-            media_body=media
-        ).execute()
-        
-        return True
-    except Exception as e:
-        print(f"Error saving to Google Drive: {e}")
-        return False
+def save_sessions_to_drive(sessions, token_file=TOKEN_FILE):
+    """Save tea sessions to Google Drive.
 
-def load_sessions_from_drive():
-    """Load tea sessions from Google Drive."""
-    try:
-        service = get_drive_service()
-        file_id = find_or_create_tea_sessions_file(service)
-        
-        # Download file content
-        response = service.files().get_media(fileId=file_id).execute()
-        
-        # Parse JSON content
-        if response:
-            content = response.decode('utf-8')
-            return json.loads(content)
-        return []
-    except Exception as e:
-        print(f"Error loading from Google Drive: {e}")
-        return []
\ No newline at end of file
+    Errors are raised to the caller, which decides whether to retry.
+    """
+    service = get_drive_service(token_file)
+    file_id = find_or_create_tea_sessions_file(service)
+    
+    # Convert sessions to JSON string
+    content = json.dumps(sessions)
+    file_content = io.BytesIO(content.encode('utf-8'))
+    media = MediaIoBaseUpload(file_content, mimetype='application/json')
+    
+    # Update file content
+    service.files().update(
+        fileId=file_id,
+        media_body=media
+    ).execute()
+    
+    return True
+
+def load_sessions_from_drive(token_file=TOKEN_FILE):
+    """Load tea sessions from Google Drive.
+
+    Errors are raised rather than returning an empty list, which would be
+    indistinguishable from an empty history.
+    """
+    service = get_drive_service(token_file)
+    file_id = find_or_create_tea_sessions_file(service)
+    
+    # Download file content
+    response = service.files().get_media(fileId=file_id).execute()
+    
+    # Parse JSON content
+    if response:
+        content = response.decode('utf-8')
+        return json.loads(content)
+    return []
\ No newline at end of file
@@ -0,0 +1,172 @@
+# events.py
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from file_store import version_stamp, VERSION_SLOTS
+
+# Seconds between heartbeat comments on idle event streams
+HEARTBEAT_INTERVAL = 15
+
+# Number of past events kept for clients resuming with Last-Event-ID
+EVENT_HISTORY_SIZE = 1000
+
+class EventBus:
+    """In-process publisher of data change notifications.
+
+    Keeps a bounded history so reconnecting clients can resume from their
+    last event id. Threaded subscribers block on a condition; asyncio
+    subscribers are woken through their own event loop, so idle ASGI
+    streams don't hold a thread.
+    """
+
+    def __init__(self, history_size=EVENT_HISTORY_SIZE):
+        """Initialize the event bus."""
+        self.history = deque(maxlen=history_size)
+        self.next_id = 1
+        self.condition = threading.Condition()
+        self.async_waiters = set()
+
+    @property
+    def last_id(self):
+        """Id of the most recently published event."""
+        return self.next_id - 1
+
+    def publish(self, resource, resource_id=None, version=None):
+        """Publish a change to a resource and wake all subscribers."""
+        with self.condition:
+            event = {
+                'id': self.next_id,
+                'resource': resource,
+                'resourceId': resource_id,
+                'version': version,
+                'time': time.time()
+            }
+            self.next_id += 1
+            self.history.append(event)
+            self.condition.notify_all()
+            waiters = list(self.async_waiters)
+
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(waiter.set)
+        return event
+
+    def events_since(self, last_id):
+        """Return events after the given id, or None if they are no longer buffered."""
+        with self.condition:
+            if last_id == self.last_id:
+                return []
+            if last_id > self.last_id:
+                # An id from before a restart of this process
+                return None
+            if not self.history or self.history[0]['id'] > last_id + 1:
+                return None
+            return [event for event in self.history if event['id'] > last_id]
+
+    def wait(self, last_id, timeout):
+        """Block until there are events after the given id or the timeout expires."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.last_id > last_id, timeout)
+        return self.events_since(last_id)
+
+    async def wait_async(self, last_id, timeout):
+        """Wait without blocking a thread until there are events after the given id."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self.condition:
+            self.async_waiters.add(waiter)
+        try:
+            if self.last_id <= last_id:
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self.condition:
+                self.async_waiters.discard(waiter)
+        return self.events_since(last_id)
+
+# Create a global instance of the event bus
+event_bus = EventBus()
+
+def format_event(event, event_type='change'):
+    """Format an event as a server-sent events message."""
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(event)}')
+    return '\n'.join(lines) + '\n\n'
+
+def parse_last_event_id(value):
+    """Parse a Last-Event-ID value, returning None if it is missing or invalid."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class EventStream:
+    """State of one subscriber's event stream."""
+
+    def __init__(self, bus, stamp, last_event_id=None):
+        """Start after the given event id, or at the current end of the history."""
+        self.bus = bus
+        self.stamp = stamp
+        self.last_id = bus.last_id if last_event_id is None else last_event_id
+        self.versions = {name: stamp.get(name) for name in VERSION_SLOTS}
+
+    def render(self, events):
+        """Render newly published events, or a reset if some were missed."""
+        if events is None:
+            # The client missed events that are no longer buffered
+            self.last_id = self.bus.last_id
+            return format_event({'id': self.last_id, 'resource': None}, 'reset')
+
+        chunks = []
+        for event in events:
+            self.last_id = event['id']
+            if event['resource'] in self.versions and event['version'] is not None:
+                self.versions[event['resource']] = event['version']
+            chunks.append(format_event(event))
+        return ''.join(chunks)
+
+    def render_external_changes(self):
+        """Report writes made by other worker processes, seen through the version stamp."""
+        chunks = []
+        for name, seen in self.versions.items():
+            version = self.stamp.get(name)
+            if version != seen:
+                self.versions[name] = version
+                chunks.append(format_event({'resource': name, 'resourceId': None,
+                                            'version': version, 'time': time.time()}))
+        return ''.join(chunks)
+
+def event_stream(bus=event_bus, stamp=version_stamp, last_event_id=None,
+                 heartbeat=HEARTBEAT_INTERVAL):
+    """Yield server-sent events for a threaded server, with periodic heartbeats."""
+    stream = EventStream(bus, stamp, last_event_id)
+    yield 'retry: 3000\n\n'
+
+    missed = stream.render(bus.events_since(stream.last_id))
+    if missed:
+        yield missed
+
+    while True:
+        events = bus.wait(stream.last_id, heartbeat)
+        chunk = stream.render(events) + stream.render_external_changes()
+        yield chunk or ': heartbeat\n\n'
+
+async def async_event_stream(bus=event_bus, stamp=version_stamp, last_event_id=None,
+                             heartbeat=HEARTBEAT_INTERVAL):
+    """Yield server-sent events for an asyncio server, with periodic heartbeats."""
+    stream = EventStream(bus, stamp, last_event_id)
+    yield 'retry: 3000\n\n'
+
+    missed = stream.render(bus.events_since(stream.last_id))
+    if missed:
+        yield missed
+
+    while True:
+        events = await bus.wait_async(stream.last_id, heartbeat)
+        chunk = stream.render(events) + stream.render_external_changes()
+        yield chunk or ': heartbeat\n\n'
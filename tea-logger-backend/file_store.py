@@ -0,0 +1,132 @@
+# file_store.py
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock, locks become no-ops
+    fcntl = None
+
+# Shared counters used by every worker process to detect writes made elsewhere
+VERSION_FILE = 'tea_logger.version'
+VERSION_SLOTS = ('sessions', 'teas')
+
+# Locks already held by the current thread, so nested helpers don't deadlock
+_held_locks = threading.local()
+
+# Permissions for new data files, as open(path, 'w') would create them
+_umask = os.umask(0)
+os.umask(_umask)
+DATA_FILE_MODE = 0o666 & ~_umask
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Hold an advisory lock for a data file across processes.
+
+    The lock lives on a sidecar ``<path>.lock`` file so the data file itself
+    can be replaced atomically while the lock is held. Re-entering the lock
+    for the same path from the same thread is a no-op.
+    """
+    held = getattr(_held_locks, 'paths', None)
+    if held is None:
+        held = _held_locks.paths = set()
+
+    if path in held:
+        yield
+        return
+
+    with open(f'{path}.lock', 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        held.add(path)
+        try:
+            yield
+        finally:
+            held.discard(path)
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def read_json(path, default=None):
+    """Read a JSON file, returning the default if it doesn't exist."""
+    if not os.path.exists(path):
+        return default
+
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_json_atomic(path, data):
+    """Write JSON to a temporary file and rename it over the target.
+
+    Readers in other processes see either the old or the new file, never a
+    partially written one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory,
+                                    prefix=f'.{os.path.basename(path)}.',
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, DATA_FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+class VersionStamp:
+    """Per-resource write counters kept in a shared memory-mapped file.
+
+    Reading a counter is a plain memory access, so every worker can check it
+    on each cache lookup. Writers bump the counter after persisting a change.
+    """
+
+    SLOT_FORMAT = '<Q'
+    SLOT_SIZE = struct.calcsize(SLOT_FORMAT)
+
+    def __init__(self, path=VERSION_FILE, slots=VERSION_SLOTS):
+        """Initialize the stamp; the file is mapped on first use."""
+        self.path = path
+        self.offsets = {name: i * self.SLOT_SIZE for i, name in enumerate(slots)}
+        self.size = len(slots) * self.SLOT_SIZE
+        self._map = None
+        self._map_lock = threading.Lock()
+
+    def _get_map(self):
+        """Open and map the version file, creating it if needed."""
+        if self._map is not None:
+            return self._map
+
+        with self._map_lock:
+            if self._map is None:
+                with file_lock(self.path):
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        if os.fstat(fd).st_size < self.size:
+                            os.ftruncate(fd, self.size)
+                        self._map = mmap.mmap(fd, self.size)
+                    finally:
+                        os.close(fd)
+        return self._map
+
+    def get(self, name):
+        """Get the current version of a resource."""
+        return struct.unpack_from(self.SLOT_FORMAT, self._get_map(), self.offsets[name])[0]
+
+    def bump(self, name):
+        """Increment the version of a resource and return the new value."""
+        shared_map = self._get_map()
+        with file_lock(self.path):
+            version = self.get(name) + 1
+            struct.pack_into(self.SLOT_FORMAT, shared_map, self.offsets[name], version)
+        return version
+
+# Create a global instance of the version stamp
+version_stamp = VersionStamp()
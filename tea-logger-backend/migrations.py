@@ -0,0 +1,127 @@
+# migrations.py
+import json
+import os
+from binary_snapshot import write_snapshot
+from file_store import file_lock, read_json, write_json_atomic, version_stamp
+from models import Tea
+from utils import ensure_string_id
+
+# Records which migrations have been applied to the data files
+SCHEMA_VERSION_FILE = 'tea_logger_schema.json'
+
+def extract_teas_from_sessions(sessions, teas):
+    """Build the tea collection from session data if it is still empty."""
+    if teas:
+        return sessions, teas
+
+    # Extract unique teas, matching names case-insensitively like backfill_tea_ids
+    extracted = {}
+    for session in sessions:
+        name = session.get('name')
+        if name and name.lower() not in extracted:
+            # Create a Tea object from the session data
+            extracted[name.lower()] = Tea.from_legacy(session).to_dict()
+
+    return sessions, list(extracted.values())
+
+def normalize_ids(sessions, teas):
+    """Store every session, tea and teaId reference as a string."""
+    for session in sessions:
+        session['id'] = ensure_string_id(session.get('id'))
+        session['teaId'] = ensure_string_id(session.get('teaId')) or ''
+
+    for tea in teas:
+        tea['id'] = ensure_string_id(tea.get('id'))
+
+    return sessions, teas
+
+def convert_legacy_age(sessions, teas):
+    """Replace the legacy 'age' field with 'year'."""
+    for record in sessions + teas:
+        if 'age' in record:
+            age = record.pop('age')
+            record['year'] = record.get('year') or age or ''
+
+    return sessions, teas
+
+def backfill_tea_ids(sessions, teas):
+    """Link sessions without a teaId to the tea with the same name."""
+    tea_ids_by_name = {}
+    for tea in teas:
+        tea_ids_by_name.setdefault(tea.get('name', '').lower(), tea['id'])
+
+    for session in sessions:
+        if not session.get('teaId') and session.get('name'):
+            session['teaId'] = tea_ids_by_name.get(session['name'].lower(), '')
+
+    return sessions, teas
+
+# Ordered (version, migration) pairs; append new migrations with the next version
+MIGRATIONS = [
+    (1, extract_teas_from_sessions),
+    (2, normalize_ids),
+    (3, convert_legacy_age),
+    (4, backfill_tea_ids),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def load_data_file(path):
+    """Load a JSON list, returning whether it is safe to write back."""
+    try:
+        data = read_json(path)
+    except json.JSONDecodeError:
+        print(f"Could not parse {path}, leaving it untouched")
+        return [], False
+
+    return (data if data is not None else []), True
+
+def run_migrations(sessions_file, teas_file, schema_file=SCHEMA_VERSION_FILE, stamp=version_stamp):
+    """Apply pending migrations to the data files once and record the schema version.
+
+    Workers starting at the same time serialize on the schema file lock, so
+    only the first one does any work.
+    """
+    with file_lock(schema_file):
+        schema = read_json(schema_file) or {}
+        current_version = schema.get('version', 0)
+        pending = [(version, migrate) for version, migrate in MIGRATIONS
+                   if version > current_version]
+
+        if not pending:
+            return current_version
+
+        # New data directories start out at the current schema
+        if not os.path.exists(sessions_file) and not os.path.exists(teas_file):
+            write_json_atomic(schema_file, {'version': SCHEMA_VERSION})
+            return SCHEMA_VERSION
+
+        with file_lock(sessions_file), file_lock(teas_file):
+            sessions_existed = os.path.exists(sessions_file)
+            sessions, sessions_writable = load_data_file(sessions_file)
+            teas, teas_writable = load_data_file(teas_file)
+
+            for version, migrate in pending:
+                sessions, teas = migrate(sessions, teas)
+                print(f"Applied migration {version}: {migrate.__name__}")
+
+            # Rewrite the files, compacting them into fresh binary snapshots as well
+            if sessions_existed and sessions_writable:
+                write_json_atomic(sessions_file, sessions)
+                write_snapshot(sessions_file, sessions)
+                stamp.bump('sessions')
+
+            if teas_writable:
+                write_json_atomic(teas_file, teas)
+                write_snapshot(teas_file, teas)
+                stamp.bump('teas')
+
+        write_json_atomic(schema_file, {'version': SCHEMA_VERSION})
+
+    return SCHEMA_VERSION
+
+def migrate_sessions(sessions, teas):
+    """Bring sessions loaded from elsewhere, such as Google Drive, to the current schema."""
+    for migrate in (normalize_ids, convert_legacy_age, backfill_tea_ids):
+        sessions, teas = migrate(sessions, teas)
+    return sessions
@@ -1,6 +1,7 @@
 # models.py
 from datetime import datetime
 import uuid
+from utils import ensure_string_id
 
 def generate_id():
     """Generate a unique ID for a model."""
@@ -19,7 +20,7 @@ class Tea:
     def from_dict(cls, data):
         """Create a Tea object from a dictionary."""
         tea = cls()
-        tea.id = data.get('id') or generate_id()
+        tea.id = ensure_string_id(data.get('id')) or generate_id()
         tea.name = data.get('name', '')
         tea.type = data.get('type', '')
         tea.vendor = data.get('vendor', '')
@@ -64,8 +65,8 @@ class Session:
     def from_dict(cls, data):
         """Create a Session object from a dictionary."""
         session = cls()
-        session.id = data.get('id') or generate_id()
-        session.teaId = data.get('teaId', '')
+        session.id = ensure_string_id(data.get('id')) or generate_id()
+        session.teaId = ensure_string_id(data.get('teaId')) or ''
         session.name = data.get('name', '')
         session.type = data.get('type', '')
         session.vendor = data.get('vendor', '')
@@ -0,0 +1,63 @@
+# projection.py
+import re
+
+FIELD_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_]+$')
+
+# Fields of sessions and teas returned by the lean dashboard
+LEAN_SESSION_FIELDS = ('id', 'teaId', 'name', 'timestamp')
+LEAN_TEA_FIELDS = ('id', 'name')
+
+def parse_fields(value):
+    """Parse a comma-separated fields parameter, returning None for all fields.
+
+    The id is always included so clients can match projected records to
+    full ones. Fields are sorted so equivalent requests share a cache key.
+    """
+    if not value:
+        return None
+
+    fields = {field.strip() for field in value.split(',') if field.strip()}
+    for field in fields:
+        if not FIELD_NAME_PATTERN.match(field):
+            raise ValueError(f"Invalid field: {field}")
+
+    return tuple(sorted(fields | {'id'}))
+
+def project(record, fields):
+    """Keep only the given fields of a record."""
+    if record is None or fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+def project_all(records, fields):
+    """Keep only the given fields of every record in a list."""
+    if fields is None:
+        return records
+    return [project(record, fields) for record in records]
+
+def project_dashboard(dashboard, fields=None, lean=False):
+    """Project the records of the dashboard data.
+
+    The lean dashboard keeps ids, names, timestamps and per-tea stats only,
+    and lists recent sessions by id instead of repeating them.
+    """
+    if lean:
+        return {
+            'sessions': project_all(dashboard['sessions'], fields or LEAN_SESSION_FIELDS),
+            'teas': project_all(dashboard['teas'], fields or LEAN_TEA_FIELDS),
+            'teaStats': {
+                tea_id: {'sessionCount': stats['sessionCount'], 'lastBrewed': stats['lastBrewed']}
+                for tea_id, stats in dashboard['teaStats'].items()
+            },
+            'recentSessionIds': [session['id'] for session in dashboard['recentSessions']]
+        }
+
+    if fields is None:
+        return dashboard
+
+    return {
+        **dashboard,
+        'sessions': project_all(dashboard['sessions'], fields),
+        'teas': project_all(dashboard['teas'], fields),
+        'recentSessions': project_all(dashboard['recentSessions'], fields)
+    }
@@ -0,0 +1,124 @@
+# record_set.py
+from tea_index import TeaSessionIndex
+
+class RecordSet(tuple):
+    """Immutable version of a collection of records, shared by all readers.
+
+    Records are dicts that are never modified once they belong to a version,
+    so readers need no locks and a version can be handed out, cached and
+    serialized as is. Writers derive the next version through a RecordDraft.
+    """
+
+    def __new__(cls, records=(), tea_index=None):
+        """Create a version holding the given records."""
+        record_set = super().__new__(cls, records)
+        record_set._tea_index = tea_index
+        record_set._by_id = None
+        return record_set
+
+    def get(self, record_id):
+        """Look up a record by id; the lookup table is built on first use."""
+        if self._by_id is None:
+            # Build in reverse so the first record with an id wins, as in a scan
+            self._by_id = {record.get('id'): record for record in reversed(self)}
+        return self._by_id.get(record_id)
+
+    @property
+    def tea_index(self):
+        """Sessions of each tea in this version, built on first use."""
+        if self._tea_index is None:
+            self._tea_index = TeaSessionIndex.build(self)
+        return self._tea_index
+
+    def draft(self):
+        """Start building the next version."""
+        return RecordDraft(self)
+
+class RecordDraft:
+    """Working copy a writer turns into the next version of a RecordSet.
+
+    Only the list of references is copied; unchanged records are shared with
+    the base version, and changed records are replaced rather than modified.
+    The changes are remembered so the next tea index is derived from the
+    base version's index instead of being rebuilt.
+    """
+
+    def __init__(self, base):
+        """Initialize the draft from the version it builds on."""
+        self.base = base
+        self.records = list(base)
+        self.removed = []
+        self.added = []
+
+    def __iter__(self):
+        """Iterate over the draft's records."""
+        return iter(self.records)
+
+    def __len__(self):
+        """Number of records in the draft."""
+        return len(self.records)
+
+    def __getitem__(self, position):
+        """Get the record at a position."""
+        return self.records[position]
+
+    def _forget(self, record):
+        """Note that a record left the draft."""
+        for i, added in enumerate(self.added):
+            if added is record:
+                del self.added[i]
+                return
+        self.removed.append(record)
+
+    def find(self, record_id):
+        """Get the position of the record with an id, or None."""
+        for i, record in enumerate(self.records):
+            if record.get('id') == record_id:
+                return i
+        return None
+
+    def append(self, record):
+        """Add a record at the end."""
+        self.records.append(record)
+        self.added.append(record)
+        return record
+
+    def replace(self, position, record):
+        """Replace the record at a position with a new version of it."""
+        self._forget(self.records[position])
+        self.records[position] = record
+        self.added.append(record)
+        return record
+
+    def pop(self, position):
+        """Remove and return the record at a position."""
+        record = self.records.pop(position)
+        self._forget(record)
+        return record
+
+    def update_records(self, records, changes):
+        """Replace the given records with copies that have the changes applied.
+
+        Returns the number of records changed.
+        """
+        replacements = {id(record): {**record, **changes} for record in records}
+        if not replacements:
+            return 0
+
+        self.records = [replacements.get(id(record), record) for record in self.records]
+        for record in records:
+            self._forget(record)
+        self.added.extend(replacements.values())
+        return len(replacements)
+
+    @property
+    def tea_index(self):
+        """Sessions of each tea in the draft as it currently stands."""
+        return self.base.tea_index.updated(self.removed, self.added)
+
+    def freeze(self):
+        """Build the next version from the draft."""
+        tea_index = None
+        if self.base._tea_index is not None:
+            tea_index = self.base._tea_index.updated(self.removed, self.added)
+        return RecordSet(self.records, tea_index)
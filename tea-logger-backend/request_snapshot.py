@@ -0,0 +1,39 @@
+# request_snapshot.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Data loaded during the current snapshot scope, keyed by resource type
+_snapshot = ContextVar('snapshot', default=None)
+
+@contextmanager
+def snapshot_scope():
+    """Share loaded storage data across everything run inside the scope.
+
+    Used by batched requests so sub-requests read each file at most once.
+    Nested scopes reuse the outer one.
+    """
+    if _snapshot.get() is not None:
+        yield
+        return
+
+    token = _snapshot.set({})
+    try:
+        yield
+    finally:
+        _snapshot.reset(token)
+
+def snapshot_get(resource_type, loader):
+    """Return the snapshot copy of a resource, loading it on first use."""
+    snapshot = _snapshot.get()
+    if snapshot is None:
+        return loader()
+
+    if resource_type not in snapshot:
+        snapshot[resource_type] = loader()
+    return snapshot[resource_type]
+
+def snapshot_clear():
+    """Drop all loaded data, e.g. after a request in the scope wrote to storage."""
+    snapshot = _snapshot.get()
+    if snapshot is not None:
+        snapshot.clear()
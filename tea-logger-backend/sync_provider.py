@@ -0,0 +1,61 @@
+# sync_provider.py
+import importlib
+import threading
+
+class SyncProvider:
+    """Remote storage that session data can be synced with."""
+
+    def load_sessions(self):
+        """Load tea sessions from the remote storage."""
+        raise NotImplementedError
+
+    def save_sessions(self, sessions):
+        """Save tea sessions to the remote storage."""
+        raise NotImplementedError
+
+class LazyModuleSyncProvider(SyncProvider):
+    """Sync provider backed by a module that is only imported on first use.
+
+    Keeps heavy client libraries out of workers that never sync remotely.
+    """
+
+    def __init__(self, module_name, load_function, save_function, **options):
+        """Initialize the provider with the module and function names to use.
+
+        Extra keyword options are passed to both functions on every call.
+        """
+        self.module_name = module_name
+        self.load_function = load_function
+        self.save_function = save_function
+        self.options = options
+        self._module = None
+        self._import_lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        """Whether the backing module has been imported."""
+        return self._module is not None
+
+    def _get_module(self):
+        """Import the backing module if it hasn't been imported yet."""
+        if self._module is None:
+            with self._import_lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.module_name)
+        return self._module
+
+    def load_sessions(self):
+        """Load tea sessions through the backing module."""
+        return getattr(self._get_module(), self.load_function)(**self.options)
+
+    def save_sessions(self, sessions):
+        """Save tea sessions through the backing module."""
+        return getattr(self._get_module(), self.save_function)(sessions, **self.options)
+
+def drive_sync_provider(**options):
+    """Create a Google Drive sync provider; options such as token_file go to drive_service."""
+    return LazyModuleSyncProvider('drive_service', 'load_sessions_from_drive',
+                                  'save_sessions_to_drive', **options)
+
+# Google Drive sync; the Google client libraries are imported on first Drive use
+drive_sync = drive_sync_provider()
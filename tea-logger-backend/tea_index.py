@@ -0,0 +1,89 @@
+# tea_index.py
+import bisect
+
+# Entry of a tea without sessions
+EMPTY_ENTRY = ((), ())
+
+def session_key(session):
+    """Sort key placing sessions of a tea in timestamp order."""
+    return session.get('timestamp') or '', session.get('id') or ''
+
+class TeaSessionIndex:
+    """Reverse index from tea ids to their sessions, ordered by timestamp.
+
+    Each entry holds the sort keys and the sessions of one tea, oldest first.
+    The index never changes once built: updated() derives the index of the
+    next version of the sessions, copying only the entries of teas whose
+    sessions changed, so a tea's sessions are listed or changed in O(k).
+    """
+
+    def __init__(self, entries=None):
+        """Initialize the index from its entries."""
+        self.entries = entries or {}
+
+    @classmethod
+    def build(cls, sessions):
+        """Build the index of a session list."""
+        grouped = {}
+        for session in sessions:
+            if session.get('teaId'):
+                grouped.setdefault(session['teaId'], []).append(session)
+
+        entries = {}
+        for tea_id, tea_sessions in grouped.items():
+            tea_sessions.sort(key=session_key)
+            entries[tea_id] = ([session_key(session) for session in tea_sessions], tea_sessions)
+        return cls(entries)
+
+    def updated(self, removed, added):
+        """Derive the index after the removed sessions were dropped and the added ones stored."""
+        if not removed and not added:
+            return self
+
+        entries = dict(self.entries)
+        copied = set()
+
+        def editable_entry(tea_id):
+            if tea_id not in copied:
+                keys, tea_sessions = entries.get(tea_id, EMPTY_ENTRY)
+                entries[tea_id] = (list(keys), list(tea_sessions))
+                copied.add(tea_id)
+            return entries[tea_id]
+
+        for session in removed:
+            if session.get('teaId') not in entries:
+                continue
+            keys, tea_sessions = editable_entry(session['teaId'])
+            key = session_key(session)
+            position = bisect.bisect_left(keys, key)
+            while position < len(keys) and keys[position] == key:
+                if tea_sessions[position] is session:
+                    del keys[position]
+                    del tea_sessions[position]
+                    break
+                position += 1
+
+        for session in added:
+            if not session.get('teaId'):
+                continue
+            keys, tea_sessions = editable_entry(session['teaId'])
+            key = session_key(session)
+            position = bisect.bisect_right(keys, key)
+            keys.insert(position, key)
+            tea_sessions.insert(position, session)
+
+        for tea_id in copied:
+            if not entries[tea_id][0]:
+                del entries[tea_id]
+        return TeaSessionIndex(entries)
+
+    def sessions_of(self, tea_id):
+        """Get a tea's sessions, newest first."""
+        return self.entries.get(tea_id, EMPTY_ENTRY)[1][::-1]
+
+    def page(self, tea_id, offset, limit):
+        """Get a page of a tea's sessions, newest first, and the tea's session count."""
+        tea_sessions = self.entries.get(tea_id, EMPTY_ENTRY)[1]
+        end = max(0, len(tea_sessions) - offset)
+        start = max(0, end - limit)
+        return tea_sessions[start:end][::-1], len(tea_sessions)
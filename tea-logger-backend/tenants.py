@@ -0,0 +1,242 @@
+# tenants.py
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from binary_snapshot import RecordSnapshot
+from cache_middleware import CacheManager, cache_manager
+from drive_outbox import DriveOutbox, OUTBOX_FILE
+from events import EventBus, event_bus
+from file_store import VersionStamp, VERSION_FILE, version_stamp
+from migrations import run_migrations, SCHEMA_VERSION_FILE
+from sync_provider import drive_sync, drive_sync_provider
+
+# Data files of a tenant, relative to its data directory
+SESSIONS_FILE = 'tea_sessions.json'
+TEAS_FILE = 'tea_collection.json'
+
+# Google Drive token of a tenant, as drive_service names it
+TOKEN_FILE = 'token.json'
+
+# Directory holding one data directory per user
+USERS_DIR = os.environ.get('TEA_LOGGER_USERS_DIR', 'users')
+
+# Limits on the tenants kept in memory; idle ones are evicted least recently used first
+MAX_TENANTS = int(os.environ.get('TEA_LOGGER_MAX_TENANTS', '1000'))
+TENANT_MEMORY_BUDGET = int(float(os.environ.get('TEA_LOGGER_TENANT_MEMORY_MB', '512')) * 1024 * 1024)
+
+# Rough size in memory of parsed JSON data per byte of the file on disk
+MEMORY_PER_FILE_BYTE = 8
+
+# Request header naming the user, set by the authenticating proxy in front of the app
+USER_HEADER = 'X-Tea-User'
+USER_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+def parse_user_id(value):
+    """Validate a user id from a request, returning None if it is missing."""
+    if not value:
+        return None
+    if not USER_ID_PATTERN.match(value):
+        raise ValueError("Invalid user ID")
+    return value
+
+class Tenant:
+    """Storage, caches and sync state of one user's data directory.
+
+    The default tenant has no user id and uses the data files in the working
+    directory together with the global cache, version stamp and event bus.
+    """
+
+    def __init__(self, user_id=None, data_dir=''):
+        """Initialize the tenant; nothing is read until it is used."""
+        self.user_id = user_id
+        self.data_dir = data_dir
+        self.sessions_file = os.path.join(data_dir, SESSIONS_FILE)
+        self.teas_file = os.path.join(data_dir, TEAS_FILE)
+        self.schema_file = os.path.join(data_dir, SCHEMA_VERSION_FILE)
+
+        if user_id is None:
+            self.stamp = version_stamp
+            self.cache = cache_manager
+            self.events = event_bus
+            self.drive_sync = drive_sync
+        else:
+            self.stamp = VersionStamp(os.path.join(data_dir, VERSION_FILE))
+            self.cache = CacheManager(self.stamp)
+            self.events = EventBus()
+            self.drive_sync = drive_sync_provider(token_file=os.path.join(data_dir, TOKEN_FILE))
+
+        # Queues session pushes to Google Drive and retries them while Drive is unavailable
+        self.drive_outbox = DriveOutbox(self.drive_sync, self.sessions_file,
+                                        os.path.join(data_dir, OUTBOX_FILE))
+
+        # Binary snapshots answering id and recent lookups without loading the JSON files
+        self.sessions_snapshot = RecordSnapshot(self.sessions_file)
+        self.tea_snapshot = RecordSnapshot(self.teas_file)
+
+        # Set up by the app, see TenantRegistry.on_load
+        self.session_writes = None
+
+        self.active_requests = 0
+        self.memory = 0
+
+    def load(self):
+        """Bring the data files up to date and resume pushes left over from a previous run."""
+        if self.data_dir:
+            os.makedirs(self.data_dir, exist_ok=True)
+
+        run_migrations(self.sessions_file, self.teas_file, self.schema_file, self.stamp)
+
+        if self.drive_outbox.pending():
+            self.drive_outbox.start()
+
+    def publish_change(self, resource, resource_id=None):
+        """Notify this tenant's subscribers that a resource changed."""
+        return self.events.publish(resource, resource_id, self.stamp.get(resource))
+
+    def busy(self):
+        """Whether requests are using the tenant or its outbox is pushing to Drive."""
+        return self.active_requests > 0 or self.drive_outbox.active
+
+    def memory_estimate(self):
+        """Estimate the memory held by the cached data and its cached serializations."""
+        sizes = {'sessions': self.sessions_file, 'teas': self.teas_file}
+        total = 0
+        for cache in self.cache.caches.values():
+            total += sum(len(body) for body in cache['encoded'].values())
+            if cache['data'] is None:
+                continue
+            for name in cache['depends_on']:
+                try:
+                    total += os.path.getsize(sizes[name]) * MEMORY_PER_FILE_BYTE
+                except OSError:
+                    pass
+        return total
+
+class TenantRegistry:
+    """Least recently used set of loaded tenants with a count and memory limit.
+
+    Only idle tenants are evicted; their files stay on disk and are loaded
+    again on the next request. The default tenant is never evicted.
+    """
+
+    def __init__(self, users_dir=USERS_DIR, max_tenants=MAX_TENANTS,
+                 memory_budget=TENANT_MEMORY_BUDGET):
+        """Initialize an empty registry."""
+        self.users_dir = users_dir
+        self.max_tenants = max_tenants
+        self.memory_budget = memory_budget
+        self.tenants = OrderedDict()
+        self.default = None
+        self.setup = None
+        self.lock = threading.Lock()
+
+    def on_load(self, setup):
+        """Register a function called with every tenant before it is first used."""
+        self.setup = setup
+        return setup
+
+    def _load(self, tenant):
+        """Load a new tenant and run the setup hook."""
+        tenant.load()
+        if self.setup:
+            self.setup(tenant)
+        return tenant
+
+    def get(self, user_id=None, acquire=False):
+        """Get the tenant of a user, loading it if needed, or the default tenant.
+
+        With acquire, the tenant is marked busy until it is released.
+        """
+        if user_id is None:
+            if self.default is None:
+                with self.lock:
+                    if self.default is None:
+                        self.default = self._load(Tenant())
+            with self.lock:
+                self.default.active_requests += acquire
+            return self.default
+
+        with self.lock:
+            tenant = self.tenants.get(user_id)
+            if tenant is not None:
+                self.tenants.move_to_end(user_id)
+                tenant.active_requests += acquire
+                return tenant
+
+        # Load outside the registry lock so a slow migration only delays this user
+        tenant = self._load(Tenant(user_id, os.path.join(self.users_dir, user_id)))
+
+        with self.lock:
+            # Another request may have loaded the same user in the meantime
+            tenant = self.tenants.setdefault(user_id, tenant)
+            self.tenants.move_to_end(user_id)
+            tenant.active_requests += acquire
+            self._evict()
+        return tenant
+
+    def acquire(self, user_id=None):
+        """Get a tenant and mark it busy until released."""
+        return self.get(user_id, acquire=True)
+
+    def release(self, tenant):
+        """Mark a request on the tenant as finished and enforce the limits."""
+        memory = tenant.memory_estimate()
+        with self.lock:
+            tenant.active_requests -= 1
+            tenant.memory = memory
+            self._evict()
+
+    def memory_used(self):
+        """Estimated memory held by all loaded tenants."""
+        default_memory = self.default.memory if self.default else 0
+        return default_memory + sum(tenant.memory for tenant in self.tenants.values())
+
+    def _evict(self):
+        """Drop idle tenants, least recently used first, until the limits are met."""
+        memory = self.memory_used()
+        for user_id, tenant in list(self.tenants.items()):
+            if len(self.tenants) <= self.max_tenants and memory <= self.memory_budget:
+                return
+            if tenant.busy():
+                continue
+            del self.tenants[user_id]
+            memory -= tenant.memory
+
+    def stats(self):
+        """Summarize the loaded tenants for the sync status endpoint."""
+        with self.lock:
+            return {
+                'loaded': len(self.tenants),
+                'max_tenants': self.max_tenants,
+                'memory_used': self.memory_used(),
+                'memory_budget': self.memory_budget
+            }
+
+# Create a global instance of the tenant registry
+tenant_registry = TenantRegistry()
+
+# Tenant of the request being handled
+_current_tenant = ContextVar('tenant', default=None)
+
+def current_tenant():
+    """Get the tenant of the current request, or the default tenant outside requests."""
+    tenant = _current_tenant.get()
+    return tenant if tenant is not None else tenant_registry.get()
+
+def set_current_tenant(tenant):
+    """Make a tenant current and return the previous one so it can be restored."""
+    previous = _current_tenant.get()
+    _current_tenant.set(tenant)
+    return previous
+
+@contextmanager
+def tenant_scope(tenant):
+    """Make a tenant current for the code run inside the scope."""
+    previous = set_current_tenant(tenant)
+    try:
+        yield tenant
+    finally:
+        set_current_tenant(previous)
@@ -0,0 +1,147 @@
+# write_coordinator.py
+import contextvars
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+class PendingWrite:
+    """A mutation waiting to be applied by the committer."""
+
+    def __init__(self, mutation, use_drive):
+        """Initialize the pending write."""
+        self.mutation = mutation
+        self.use_drive = use_drive
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+class WriteCoordinator:
+    """Applies concurrent mutations in batches with a single load and persist.
+
+    Requests submit a mutation and block until it has been committed. A
+    committer thread collects pending mutations for up to ``max_latency``
+    seconds or ``max_batch_size`` writes, applies them in order to one loaded
+    copy of the data, persists once and then wakes every waiter.
+
+    A mutation receives the loaded data, changes it in place and returns its
+    result, or returns None when it made no change. Batches run in an empty
+    context entered through ``scope``, so nothing set by the submitting
+    requests leaks into them, and the committer thread exits after
+    ``idle_timeout`` seconds without writes.
+    """
+
+    def __init__(self, load, persist, lock=None, scope=None, max_batch_size=64,
+                 max_latency=0.002, idle_timeout=5):
+        """Initialize the coordinator with storage callbacks and batching limits."""
+        self.load = load
+        self.persist = persist
+        self.lock = lock or nullcontext
+        self.scope = scope or nullcontext
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.idle_timeout = idle_timeout
+        self.pending = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, mutation, use_drive=False):
+        """Queue a mutation, wait for its batch to commit and return its result."""
+        write = PendingWrite(mutation, use_drive)
+        self.pending.put(write)
+        self._ensure_committer()
+        write.done.wait()
+
+        if write.error is not None:
+            raise write.error
+        return write.result
+
+    @property
+    def active(self):
+        """Whether the committer thread is running."""
+        return self._thread is not None and self._pid == os.getpid()
+
+    def _ensure_committer(self):
+        """Start the committer thread, including after a fork into a new worker.
+
+        Always checked under the lock, which the exiting committer holds while
+        it sees an empty queue and clears itself, so a write is never left
+        queued without a thread.
+        """
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='session-committer',
+                                                daemon=True)
+                self._thread.start()
+
+    def _collect_batch(self):
+        """Wait for a write, then gather more until the latency or size limit is hit.
+
+        Returns None once no write has arrived for the idle timeout.
+        """
+        try:
+            batch = [self.pending.get(timeout=self.idle_timeout)]
+        except queue.Empty:
+            return None
+
+        deadline = time.monotonic() + self.max_latency
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self.pending.get(timeout=remaining))
+                else:
+                    batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _commit(self, batch):
+        """Apply a batch of writes and persist the result once."""
+        contextvars.Context().run(self._apply_batch, batch)
+
+        for write in batch:
+            write.done.set()
+
+    def _apply_batch(self, batch):
+        """Load the data, apply every write in the batch and persist."""
+        use_drive = any(write.use_drive for write in batch)
+
+        try:
+            with self.scope(), self.lock():
+                data = self.load(use_drive)
+                changed = False
+
+                for write in batch:
+                    try:
+                        write.result = write.mutation(data)
+                        changed = changed or write.result is not None
+                    except Exception as e:
+                        write.error = e
+
+                if changed:
+                    self.persist(data, use_drive)
+        except Exception as e:
+            # Loading or persisting failed, so none of the writes were stored
+            for write in batch:
+                write.result = None
+                write.error = e
+
+    def _run(self):
+        """Commit batches until no writes arrive for the idle timeout."""
+        while True:
+            batch = self._collect_batch()
+            if batch is not None:
+                self._commit(batch)
+                continue
+
+            with self._start_lock:
+                # A write queued after the timeout is picked up before exiting
+                if self.pending.empty():
+                    self._thread = None
+                    return
@@ -0,0 +1,143 @@
+/* eslint-disable no-restricted-globals */
+
+// record-db.js - Schema and write logic of the IndexedDB cache of sessions and teas
+//
+// Loaded as a classic script by both the page (index.html) and the service
+// worker (importScripts), so the two always open and update the database the
+// same way. Exposes its functions as self.TeaLoggerRecordDB.
+
+(() => {
+  const RECORD_DB_NAME = 'tea-logger-records';
+  const RECORD_DB_VERSION = 1;
+
+  const SESSIONS_STORE = 'sessions';
+  const TEAS_STORE = 'teas';
+  const META_STORE = 'meta';
+
+  let dbPromise = null;
+
+  // Open the database, creating the stores on first use
+  const openRecordDB = () => {
+    if (!dbPromise) {
+      dbPromise = new Promise((resolve, reject) => {
+        if (typeof indexedDB === 'undefined') {
+          reject(new Error('IndexedDB is not available'));
+          return;
+        }
+
+        const request = indexedDB.open(RECORD_DB_NAME, RECORD_DB_VERSION);
+
+        request.onerror = () => reject(new Error('Failed to open record database'));
+
+        request.onupgradeneeded = (event) => {
+          const db = event.target.result;
+
+          db.createObjectStore(SESSIONS_STORE, { keyPath: 'id' });
+          db.createObjectStore(TEAS_STORE, { keyPath: 'id' });
+          db.createObjectStore(META_STORE, { keyPath: 'key' });
+        };
+
+        request.onsuccess = (event) => resolve(event.target.result);
+      });
+
+      // Let a later call try again, e.g. after the user allows storage
+      dbPromise.catch(() => {
+        dbPromise = null;
+      });
+    }
+
+    return dbPromise;
+  };
+
+  // Run a transaction and resolve with the value set by the callback once it commits
+  const runTransaction = async (storeNames, mode, callback) => {
+    const db = await openRecordDB();
+
+    return new Promise((resolve, reject) => {
+      const transaction = db.transaction(storeNames, mode);
+      const result = { value: undefined };
+
+      transaction.oncomplete = () => resolve(result.value);
+      transaction.onerror = () => reject(transaction.error || new Error('Record transaction failed'));
+      transaction.onabort = () => reject(transaction.error || new Error('Record transaction aborted'));
+
+      callback(transaction, result);
+    });
+  };
+
+  // Whether two records hold the same values, comparing nested values as JSON
+  const sameRecord = (a, b) => {
+    const keys = Object.keys(a);
+    if (keys.length !== Object.keys(b).length) {
+      return false;
+    }
+
+    return keys.every(key => {
+      const value = a[key];
+      if (value !== null && typeof value === 'object') {
+        return JSON.stringify(value) === JSON.stringify(b[key]);
+      }
+      return value === b[key];
+    });
+  };
+
+  // Write the records that differ from the stored ones and delete the records that are gone
+  const applyRecords = (store, records, counts) => {
+    const request = store.getAll();
+
+    request.onsuccess = () => {
+      const stored = new Map(request.result.map(record => [record.id, record]));
+
+      records.forEach(record => {
+        const current = stored.get(record.id);
+        stored.delete(record.id);
+        if (!current || !sameRecord(current, record)) {
+          store.put(record);
+          counts.changed += 1;
+        }
+      });
+
+      stored.forEach((record, id) => {
+        store.delete(id);
+        counts.changed += 1;
+      });
+    };
+  };
+
+  // Replace the stored sessions; resolves to the number of records written or deleted
+  const storeSessions = async (sessions) => {
+    const counts = { changed: 0 };
+
+    await runTransaction([SESSIONS_STORE], 'readwrite', (transaction) => {
+      applyRecords(transaction.objectStore(SESSIONS_STORE), sessions, counts);
+    });
+
+    return counts.changed;
+  };
+
+  // Replace the stored dashboard; resolves to the number of records written or deleted
+  const storeDashboard = async (dashboard) => {
+    const counts = { changed: 0 };
+
+    await runTransaction([SESSIONS_STORE, TEAS_STORE, META_STORE], 'readwrite', (transaction) => {
+      applyRecords(transaction.objectStore(SESSIONS_STORE), dashboard.sessions, counts);
+      applyRecords(transaction.objectStore(TEAS_STORE), dashboard.teas, counts);
+      transaction.objectStore(META_STORE).put({
+        key: 'dashboard',
+        teaStats: dashboard.teaStats,
+        recentSessions: dashboard.recentSessions
+      });
+    });
+
+    return counts.changed;
+  };
+
+  self.TeaLoggerRecordDB = {
+    SESSIONS_STORE,
+    TEAS_STORE,
+    META_STORE,
+    runTransaction,
+    storeSessions,
+    storeDashboard
+  };
+})();
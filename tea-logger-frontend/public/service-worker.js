@@ -5,6 +5,9 @@
 // for the list of available Workbox modules, or add any other
 // code you'd like.
 
+// Record database schema and writes, shared with the page
+importScripts('record-db.js');
+
 // Cache names
 const CACHE_NAME = 'tea-logger-cache-v1';
 const API_CACHE_NAME = 'tea-logger-api-cache-v1';
@@ -15,6 +18,7 @@ const STATIC_CACHE = [
   '/static/js/0.chunk.js',
   '/static/js/bundle.js',
   '/manifest.json',
+  '/record-db.js',
   '/favicon.ico'
 ];
 
@@ -52,6 +56,13 @@ const isApiRequest = (request) => {
   return request.url.includes('/api/');
 };
 
+// Collections the page keeps in the record database rather than the response cache
+const RECORD_STORE_PATHS = ['/api/sessions', '/api/dashboard'];
+
+const isRecordStoreRequest = (request) => {
+  return RECORD_STORE_PATHS.includes(new URL(request.url).pathname);
+};
+
 
 // IndexedDB setup for better offline sync
 const DB_NAME = 'tea-logger-db';
@@ -173,6 +184,39 @@ const syncPendingRequests = async () => {
   }
 };
 
+// Store a fresh sessions or dashboard payload; resolves to the number of records changed
+const storeRecords = (resource, data) => {
+  const { storeSessions, storeDashboard } = self.TeaLoggerRecordDB;
+  return resource === 'dashboard' ? storeDashboard(data) : storeSessions(data);
+};
+
+// Fetch a collection, store what changed and tell the pages
+const revalidate = async (resource, url) => {
+  let message;
+  try {
+    const response = await fetch(url);
+    if (!response.ok) {
+      throw new Error(`Failed to revalidate ${resource}: ${response.status}`);
+    }
+    
+    const changed = await storeRecords(resource, await response.json());
+    message = { type: 'records-updated', resource, changed };
+  } catch (error) {
+    console.error(`Error revalidating ${resource}:`, error);
+    message = { type: 'records-updated', resource, changed: 0, error: error.message };
+  }
+  
+  const clients = await self.clients.matchAll({ type: 'window' });
+  clients.forEach((client) => client.postMessage(message));
+};
+
+// Revalidate collections in the background when a page serves them from the record database
+self.addEventListener('message', (event) => {
+  if (event.data && event.data.type === 'revalidate') {
+    event.waitUntil(revalidate(event.data.resource, event.data.url));
+  }
+});
+
 // Initialize IndexedDB when the service worker activates
 self.addEventListener('activate', (event) => {
   event.waitUntil(initializeDB());
@@ -181,8 +225,11 @@ self.addEventListener('activate', (event) => {
 // Update the fetch handler to use the new IndexedDB storage
 self.addEventListener('fetch', (event) => {
   if (isApiRequest(event.request)) {
-    // For API requests, use network first, then cache
-    if (event.request.method === 'GET') {
+    // For API requests, use network first, then cache. Collections kept in the
+    // record database go straight to the network; the page has its own copy.
+    if (event.request.method === 'GET' && isRecordStoreRequest(event.request)) {
+      return;
+    } else if (event.request.method === 'GET') {
       event.respondWith(
         fetch(event.request)
           .then((response) => {
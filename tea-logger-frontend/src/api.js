@@ -1,6 +1,16 @@
 // src/api.js - Fixed version with improved error handling
 import { createApiClient } from './utils/apiErrorHandler';
-import { fetchTeaById, fetchTeaByName, createTea, migrateSessionsToTeaReferences } from './teaApi';
+import { fetchTeaByName, createTea, migrateSessionsToTeaReferences } from './teaApi';
+import {
+  readSessions,
+  readDashboard,
+  storeSessions,
+  storeDashboard,
+  putSession,
+  getSession,
+  deleteStoredSession,
+  migrateLocalStorageSessions
+} from './utils/recordStore';
 
 const API_URL = 'http://127.0.0.1:5000/api';
 
@@ -38,7 +48,93 @@ const addStorageParam = (url) => {
 let lastFetchTime = 0;
 let sessionCache = null;
 
-// Fetch sessions and ensure they reference teas properly
+// Minimum time between background refreshes of a collection (milliseconds)
+const REVALIDATE_INTERVAL = 5000;
+const lastRevalidation = { sessions: 0, dashboard: 0 };
+
+// Views to notify when a background refresh changes the stored records
+const storeListeners = new Set();
+
+const notifyStoreListeners = (resource) => {
+  // Drop the in-memory copies so the next read comes from the store
+  sessionCache = null;
+  dashboardCache = null;
+  storeListeners.forEach(listener => listener(resource));
+};
+
+// The service worker reports the refreshes it ran for us
+if (typeof navigator !== 'undefined' && navigator.serviceWorker) {
+  navigator.serviceWorker.addEventListener('message', (event) => {
+    if (event.data && event.data.type === 'records-updated' && event.data.changed > 0) {
+      notifyStoreListeners(event.data.resource);
+    }
+  });
+}
+
+// Refresh a collection from the server without making the caller wait. The
+// service worker does the work off the main thread when it controls the page.
+const revalidateInBackground = (resource, url) => {
+  const now = Date.now();
+  if (now - lastRevalidation[resource] < REVALIDATE_INTERVAL) {
+    return;
+  }
+  lastRevalidation[resource] = now;
+  
+  const controller = typeof navigator !== 'undefined' && navigator.serviceWorker
+    ? navigator.serviceWorker.controller
+    : null;
+  if (controller) {
+    controller.postMessage({ type: 'revalidate', resource, url });
+    return;
+  }
+  
+  fetch(url)
+    .then(response => {
+      if (!response.ok) {
+        throw new Error(`Failed to revalidate ${resource}: ${response.status}`);
+      }
+      return response.json();
+    })
+    .then(data => (resource === 'dashboard' ? storeDashboard(data) : storeSessions(data)))
+    .then(changed => {
+      if (changed > 0) {
+        notifyStoreListeners(resource);
+      }
+    })
+    .catch(error => console.error(`Error revalidating ${resource}:`, error));
+};
+
+// Subscribe to changes a background refresh made to the stored sessions and teas.
+// The listener receives 'sessions' or 'dashboard'; returns a function that unsubscribes.
+export const subscribeToStoreUpdates = (listener) => {
+  storeListeners.add(listener);
+  return () => storeListeners.delete(listener);
+};
+
+// Sessions cached in localStorage by earlier versions are moved to the store once
+let localStorageMigration = null;
+
+// Read the stored sessions, or null if there are none or the store is unavailable
+const readStoredSessions = async () => {
+  try {
+    if (!localStorageMigration) {
+      localStorageMigration = migrateLocalStorageSessions();
+    }
+    await localStorageMigration;
+    return await readSessions();
+  } catch (error) {
+    console.error('Error reading stored sessions:', error);
+    return null;
+  }
+};
+
+// Write a collection to the store in the background
+const storeInBackground = (store, data) => {
+  store(data).catch(error => console.error('Error storing records:', error));
+};
+
+// Fetch sessions and ensure they reference teas properly. Stored sessions are
+// returned immediately and refreshed in the background; forceSync waits for the server.
 export const fetchSessions = async (forceSync = false) => {
   try {
     // Check if we have a recent cache and no force sync requested
@@ -48,9 +144,22 @@ export const fetchSessions = async (forceSync = false) => {
       return sessionCache;
     }
 
-    // Try to fetch from server using enhanced client
-    const url = addStorageParam(`${API_URL}/sessions${forceSync ? '&force_sync=true' : ''}`);
+    const url = `${addStorageParam(`${API_URL}/sessions`)}${forceSync ? '&force_sync=true' : ''}`;
+    
+    // Serve the stored sessions right away and refresh them in the background
+    if (!forceSync) {
+      const storedSessions = await readStoredSessions();
+      if (storedSessions) {
+        sessionCache = await ensureTeaReferences(storedSessions);
+        lastFetchTime = now;
+        revalidateInBackground('sessions', url);
+        return sessionCache;
+      }
+    }
+
+    // Try to fetch from server
     let sessions = [];
+    let fromServer = false;
     
     try {
       console.log('Fetching sessions from server');
@@ -61,19 +170,12 @@ export const fetchSessions = async (forceSync = false) => {
       }
       
       sessions = await response.json();
+      fromServer = true;
       console.log(`Fetched ${sessions.length} sessions from server`);
     } catch (error) {
-      console.error('Error fetching from server, falling back to local data:', error);
-      // Fallback to local storage
-      const cachedSessions = localStorage.getItem('cachedSessions');
-      if (cachedSessions) {
-        sessions = JSON.parse(cachedSessions);
-        console.log(`Using ${sessions.length} cached sessions from localStorage`);
-      } else {
-        const savedSessions = localStorage.getItem('teaSessions');
-        sessions = savedSessions ? JSON.parse(savedSessions) : [];
-        console.log(`Using ${sessions.length} saved sessions from localStorage`);
-      }
+      console.error('Error fetching from server, falling back to stored data:', error);
+      sessions = (await readStoredSessions()) || [];
+      console.log(`Using ${sessions.length} stored sessions`);
     }
     
     // Ensure sessions reference teas properly
@@ -83,8 +185,11 @@ export const fetchSessions = async (forceSync = false) => {
     sessionCache = updatedSessions;
     lastFetchTime = now;
     
-    // Cache the latest data in localStorage as a fallback
-    localStorage.setItem('cachedSessions', JSON.stringify(updatedSessions));
+    // Keep the stored copy current; only the sessions that changed are written
+    if (fromServer) {
+      lastRevalidation.sessions = now;
+      storeInBackground(storeSessions, updatedSessions);
+    }
     
     return updatedSessions;
   } catch (error) {
@@ -95,31 +200,29 @@ export const fetchSessions = async (forceSync = false) => {
       return sessionCache;
     }
     
-    const cachedSessions = localStorage.getItem('cachedSessions');
-    if (cachedSessions) {
-      return JSON.parse(cachedSessions);
-    }
-    
-    const savedSessions = localStorage.getItem('teaSessions');
-    return savedSessions ? JSON.parse(savedSessions) : [];
+    return (await readStoredSessions()) || [];
   }
 };
 
+// Whether a session predates tea references. Sessions whose tea was deleted
+// keep an empty teaId and must not get their tea recreated.
+const needsTeaReference = (session) => session.teaId === undefined || session.teaId === null;
+
 // Helper function to ensure sessions reference teas properly
 const ensureTeaReferences = async (sessions) => {
   // First, check if we need to migrate
-  const needsMigration = sessions.some(session => !session.teaId);
+  const unlinkedSessions = sessions.filter(needsTeaReference);
   
-  if (needsMigration) {
+  if (unlinkedSessions.length > 0) {
     try {
       // Create tea references for existing sessions
-      const teaMap = await migrateSessionsToTeaReferences(sessions);
+      const teaMap = await migrateSessionsToTeaReferences(unlinkedSessions);
       
       // Ensure teaMap is actually a Map object
       if (teaMap && typeof teaMap.has === 'function') {
         // Update sessions with tea references
         return sessions.map(session => {
-          if (!session.teaId && teaMap.has(session.name)) {
+          if (needsTeaReference(session) && teaMap.has(session.name)) {
             return {
               ...session,
               teaId: teaMap.get(session.name)
@@ -222,6 +325,7 @@ export const createSession = async (sessionData) => {
       if (sessionCache) {
         sessionCache = [createdSession, ...sessionCache];
       }
+      storeInBackground(putSession, createdSession);
       
       return createdSession;
     } catch (error) {
@@ -232,11 +336,8 @@ export const createSession = async (sessionData) => {
         sessionCache = [session, ...sessionCache];
       }
       
-      // Save to local storage as well
-      const cachedSessions = localStorage.getItem('cachedSessions');
-      let sessions = cachedSessions ? JSON.parse(cachedSessions) : [];
-      sessions = [session, ...sessions];
-      localStorage.setItem('cachedSessions', JSON.stringify(sessions));
+      // Save to the record store as well
+      storeInBackground(putSession, session);
       
       return session;
     }
@@ -250,11 +351,8 @@ export const createSession = async (sessionData) => {
       timestamp: sessionData.timestamp || new Date().toISOString()
     };
     
-    // Store in local storage
-    const cachedSessions = localStorage.getItem('cachedSessions');
-    let sessions = cachedSessions ? JSON.parse(cachedSessions) : [];
-    sessions = [fallbackSession, ...sessions];
-    localStorage.setItem('cachedSessions', JSON.stringify(sessions));
+    // Store in the record store
+    storeInBackground(putSession, fallbackSession);
     
     return fallbackSession;
   }
@@ -294,6 +392,7 @@ export const updateSession = async (id, sessionData) => {
           session.id.toString() === id.toString() ? updatedSession : session
         );
       }
+      storeInBackground(putSession, updatedSession);
       
       return updatedSession;
     } catch (error) {
@@ -321,27 +420,24 @@ export const updateSession = async (id, sessionData) => {
         );
       }
       
-      // Update local storage
-      const cachedSessions = localStorage.getItem('cachedSessions');
-      if (cachedSessions) {
-        let sessions = JSON.parse(cachedSessions);
-        const existingSessionIndex = sessions.findIndex(s => s.id.toString() === id.toString());
+      // Update the stored session
+      try {
+        const storedSession = await getSession(id.toString());
         
-        if (existingSessionIndex !== -1) {
+        if (storedSession) {
           // Create updated session
           const updatedSession = {
-            ...sessions[existingSessionIndex],
+            ...storedSession,
             ...sessionData,
-            id: sessions[existingSessionIndex].id,
+            id: storedSession.id,
             updated: new Date().toISOString()
           };
           
-          // Replace in array
-          sessions[existingSessionIndex] = updatedSession;
-          localStorage.setItem('cachedSessions', JSON.stringify(sessions));
-          
+          await putSession(updatedSession);
           return updatedSession;
         }
+      } catch (storeError) {
+        console.error('Error updating stored session:', storeError);
       }
       
       // Return a basic response if all else fails
@@ -383,6 +479,7 @@ export const deleteSession = async (id) => {
           session.id.toString() !== id.toString()
         );
       }
+      storeInBackground(deleteStoredSession, id.toString());
       
       return result;
     } catch (error) {
@@ -395,13 +492,8 @@ export const deleteSession = async (id) => {
         );
       }
       
-      // Update local storage
-      const cachedSessions = localStorage.getItem('cachedSessions');
-      if (cachedSessions) {
-        let sessions = JSON.parse(cachedSessions);
-        sessions = sessions.filter(session => session.id.toString() !== id.toString());
-        localStorage.setItem('cachedSessions', JSON.stringify(sessions));
-      }
+      // Update the record store
+      storeInBackground(deleteStoredSession, id.toString());
       
       return { success: true };
     }
@@ -540,7 +632,33 @@ export const setSyncInterval = async (intervalSeconds) => {
 let dashboardCache = null;
 let lastDashboardFetchTime = 0;
 
-// Fetch dashboard data (sessions, teas, and stats)
+// Read the stored dashboard, or null if there is none or the store is unavailable
+const readStoredDashboard = async () => {
+  try {
+    return await readDashboard();
+  } catch (error) {
+    console.error('Error reading stored dashboard:', error);
+    return null;
+  }
+};
+
+// Build dashboard data from the stored sessions and the locally cached teas
+const buildFallbackDashboard = async () => {
+  const storedSessions = (await readStoredSessions()) || [];
+  const cachedTeas = JSON.parse(localStorage.getItem('teaCollection') || '[]');
+  
+  return {
+    sessions: storedSessions,
+    teas: cachedTeas,
+    teaStats: {},
+    recentSessions: [...storedSessions]
+      .sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp))
+      .slice(0, 5)
+  };
+};
+
+// Fetch dashboard data (sessions, teas, and stats). The stored dashboard is
+// returned immediately and refreshed in the background; forceSync waits for the server.
 export const fetchDashboardData = async (forceSync = false) => {
   try {
     // Check if we have a recent cache and no force sync requested
@@ -550,10 +668,23 @@ export const fetchDashboardData = async (forceSync = false) => {
       return dashboardCache;
     }
     
+    const url = `${addStorageParam(`${API_URL}/dashboard`)}${forceSync ? '&force_sync=true' : ''}`;
+    
+    // Serve the stored dashboard right away and refresh it in the background
+    if (!forceSync) {
+      const storedDashboard = await readStoredDashboard();
+      if (storedDashboard) {
+        dashboardCache = storedDashboard;
+        lastDashboardFetchTime = now;
+        revalidateInBackground('dashboard', url);
+        return storedDashboard;
+      }
+    }
+    
     // Get data
     try {
       console.log('Fetching dashboard data from server');
-      const response = await fetch(addStorageParam(`${API_URL}/dashboard${forceSync ? '&force_sync=true' : ''}`));
+      const response = await fetch(url);
       
       if (!response.ok) {
         throw new Error(`Failed to fetch dashboard data: ${response.status}`);
@@ -570,9 +701,9 @@ export const fetchDashboardData = async (forceSync = false) => {
       sessionCache = data.sessions;
       lastFetchTime = now;
       
-      // Cache the latest data in localStorage as a fallback
-      localStorage.setItem('cachedDashboard', JSON.stringify(data));
-      localStorage.setItem('cachedSessions', JSON.stringify(data.sessions));
+      // Keep the stored copy current; only the records that changed are written
+      lastRevalidation.dashboard = now;
+      storeInBackground(storeDashboard, data);
       
       return data;
     } catch (error) {
@@ -583,39 +714,30 @@ export const fetchDashboardData = async (forceSync = false) => {
         return dashboardCache;
       }
       
-      // Fall back to localStorage
-      const cachedDashboard = localStorage.getItem('cachedDashboard');
-      if (cachedDashboard) {
-        return JSON.parse(cachedDashboard);
-      }
-      
-      // Last resort: build a response from separate caches
-      const cachedSessions = JSON.parse(localStorage.getItem('cachedSessions') || '[]');
-      const cachedTeas = JSON.parse(localStorage.getItem('teaCollection') || '[]');
-      
-      return {
-        sessions: cachedSessions,
-        teas: cachedTeas,
-        teaStats: {},
-        recentSessions: cachedSessions.slice(0, 5)
-      };
+      // Fall back to the record store
+      return (await readStoredDashboard()) || buildFallbackDashboard();
     }
   } catch (error) {
     console.error('Error in fetchDashboardData:', error);
     
-    // Fallback to constructing dashboard data from local storage
-    const cachedSessions = JSON.parse(localStorage.getItem('cachedSessions') || '[]');
-    const cachedTeas = JSON.parse(localStorage.getItem('teaCollection') || '[]');
-    
-    return {
-      sessions: cachedSessions,
-      teas: cachedTeas,
-      teaStats: {},
-      recentSessions: cachedSessions.slice(0, 5)
-    };
+    // Fallback to constructing dashboard data from the record store
+    return buildFallbackDashboard();
   }
 };
 
+// Fetch the lean dashboard: ids, names, timestamps and per-tea stats only.
+// Pass a list of fields to choose which session and tea fields are returned.
+export const fetchDashboardSummary = async (fields = null) => {
+  const fieldsParam = fields ? `&fields=${encodeURIComponent(fields.join(','))}` : '';
+  const response = await fetch(addStorageParam(`${API_URL}/dashboard?lean=true${fieldsParam}`));
+
+  if (!response.ok) {
+    throw new Error(`Failed to fetch dashboard summary: ${response.status}`);
+  }
+
+  return response.json();
+};
+
 // Fetch session details with associated tea
 export const fetchSessionDetails = async (sessionId) => {
   if (!sessionId) {
@@ -639,10 +761,25 @@ export const fetchSessionDetails = async (sessionId) => {
     } catch (error) {
       console.error('Error fetching session details from server:', error);
       
-      // Fall back to manual lookup
+      // Fall back to manual lookup, fetching the session and the teas in one round trip
       console.log('Falling back to manual lookup');
-      const sessions = await fetchSessions();
-      const session = sessions.find(s => s.id.toString() === sessionId.toString());
+      let session = null;
+      let teas = [];
+      try {
+        const responses = await fetchBatch([
+          { id: 'session', path: `/sessions/${sessionId}` },
+          { id: 'teas', path: '/teas' }
+        ]);
+        if (responses.session.status === 200) {
+          session = responses.session.body;
+        }
+        if (responses.teas.status === 200) {
+          teas = responses.teas.body;
+        }
+      } catch (batchError) {
+        // Offline: use the stored copy of the session
+        session = await getSession(sessionId).catch(() => null);
+      }
       
       if (!session) {
         throw new Error('Session not found');
@@ -650,9 +787,10 @@ export const fetchSessionDetails = async (sessionId) => {
       
       let tea = null;
       if (session.teaId) {
-        tea = await fetchTeaById(session.teaId);
+        tea = teas.find(t => t.id.toString() === session.teaId.toString()) || null;
       } else if (session.name) {
-        tea = await fetchTeaByName(session.name);
+        const name = session.name.toLowerCase();
+        tea = teas.find(t => t.name && t.name.toLowerCase() === name) || null;
       }
       
       if (!tea && session.name) {
@@ -671,4 +809,93 @@ export const fetchSessionDetails = async (sessionId) => {
     console.error('Error in fetchSessionDetails:', error);
     throw error;
   }
-};
\ No newline at end of file
+};
+
+// Run several API requests in a single round trip.
+// Each request is { id, method, path, body } with a path relative to the API root,
+// e.g. { id: 'tea', path: `/teas/${teaId}` }. Resolves to a map of id -> { status, body }.
+export const fetchBatch = async (requests) => {
+  try {
+    const response = await fetch(addStorageParam(`${API_URL}/batch`), {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        requests: requests.map(({ id, method = 'GET', path, body }) => ({
+          id,
+          method,
+          path: addStorageParam(`/api${path}`),
+          body
+        }))
+      }),
+    });
+    
+    if (!response.ok) {
+      throw new Error(`Failed to run batch request: ${response.status}`);
+    }
+    
+    const data = await response.json();
+    return Object.fromEntries(data.responses.map(({ id, status, body }) => [id, { status, body }]));
+  } catch (error) {
+    console.error('Error in fetchBatch:', error);
+    throw error;
+  }
+};
+
+// Views subscribed to change notifications, sharing a single event stream
+const changeListeners = new Set();
+let changeSource = null;
+
+// Open the event stream for the first subscriber
+const openChangeSource = () => {
+  const source = new EventSource(`${API_URL}/events`);
+  
+  source.addEventListener('change', (event) => {
+    const change = JSON.parse(event.data);
+    
+    // Drop client-side caches for the changed resource and refresh the
+    // stored copy on the next read
+    dashboardCache = null;
+    lastRevalidation.dashboard = 0;
+    if (change.resource === 'sessions') {
+      sessionCache = null;
+      lastRevalidation.sessions = 0;
+    }
+    
+    changeListeners.forEach(({ onChange }) => onChange(change));
+  });
+  
+  // Sent when the server no longer has the events we missed
+  source.addEventListener('reset', (event) => {
+    dashboardCache = null;
+    sessionCache = null;
+    lastRevalidation.dashboard = 0;
+    lastRevalidation.sessions = 0;
+    
+    const reset = JSON.parse(event.data);
+    changeListeners.forEach(({ onReset }) => onReset(reset));
+  });
+  
+  return source;
+};
+
+// Subscribe to server-sent change notifications ({ resource, resourceId, version }).
+// The browser reconnects automatically and resumes from the last event it received.
+// Returns a function that ends the subscription; the stream closes with the last one.
+export const subscribeToChanges = (onChange, onReset = onChange) => {
+  const listener = { onChange, onReset };
+  changeListeners.add(listener);
+  
+  if (!changeSource && typeof EventSource !== 'undefined') {
+    changeSource = openChangeSource();
+  }
+  
+  return () => {
+    changeListeners.delete(listener);
+    if (changeListeners.size === 0 && changeSource) {
+      changeSource.close();
+      changeSource = null;
+    }
+  };
+};
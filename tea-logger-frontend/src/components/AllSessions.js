@@ -2,7 +2,7 @@
 import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeft, Search, X } from 'lucide-react';
-import { fetchSessions, deleteSession } from '../api';
+import { fetchSessions, deleteSession, subscribeToStoreUpdates, subscribeToChanges } from '../api';
 import './AllSessions.css';
 
 // Import common components
@@ -31,8 +31,10 @@ const AllSessions = () => {
   const [sortBy, setSortBy] = useState('date-desc');
 
   useEffect(() => {
-    const loadSessions = async () => {
-      setIsLoading(true);
+    const loadSessions = async (refresh = false) => {
+      if (!refresh) {
+        setIsLoading(true);
+      }
       setLoadError(null);
       
       try {
@@ -51,6 +53,20 @@ const AllSessions = () => {
     };
     
     loadSessions();
+    
+    // Show fresh sessions once the background refresh has stored them, and
+    // reload when another client changes them
+    const unsubscribeStore = subscribeToStoreUpdates(() => loadSessions(true));
+    const unsubscribeChanges = subscribeToChanges((change) => {
+      if (change.resource === 'sessions') {
+        loadSessions(true);
+      }
+    }, () => loadSessions(true));
+    
+    return () => {
+      unsubscribeStore();
+      unsubscribeChanges();
+    };
   }, [showNotification]);
 
   const handleRetryLoading = useCallback(() => {
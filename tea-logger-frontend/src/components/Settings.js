@@ -1,9 +1,12 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeft, RefreshCw } from 'lucide-react';
-import { toggleStorage, getSyncStatus, setSyncInterval, forceSync } from '../api';
+import { toggleStorage, getSyncStatus, setSyncInterval, forceSync, subscribeToChanges } from '../api';
 import './Settings.css';
 
+// How often the sync status is refreshed without a change event (milliseconds)
+const SYNC_STATUS_INTERVAL = 10 * 60 * 1000;
+
 const Settings = () => {
   const [useGoogleDrive, setUseGoogleDrive] = useState(false);
   const [syncInterval, setSyncIntervalState] = useState(10); // 10 minutes default
@@ -33,10 +36,15 @@ const Settings = () => {
     // Load sync status
     loadSyncStatus();
     
-    // Refresh sync status every minute
-    const intervalId = setInterval(loadSyncStatus, 60000);
+    // Refresh sync status whenever the data changes, and every ten minutes to
+    // pick up pushes the outbox finished in the background
+    const unsubscribe = subscribeToChanges(() => loadSyncStatus());
+    const intervalId = setInterval(loadSyncStatus, SYNC_STATUS_INTERVAL);
     
-    return () => clearInterval(intervalId);
+    return () => {
+      unsubscribe();
+      clearInterval(intervalId);
+    };
   }, []);
 
   const loadSyncStatus = async () => {
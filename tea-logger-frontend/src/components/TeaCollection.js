@@ -2,7 +2,7 @@
 import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeft, Search, X, Plus } from 'lucide-react';
-import { fetchDashboardData } from '../api';
+import { fetchDashboardData, subscribeToStoreUpdates, subscribeToChanges } from '../api';
 import { updateTea, createTea, deleteTea } from '../teaApi';
 import './TeaCollection.css';
 
@@ -46,8 +46,10 @@ const TeaCollection = () => {
 
   // Load data on component mount
   useEffect(() => {
-    const loadData = async () => {
-      setIsLoading(true);
+    const loadData = async (refresh = false) => {
+      if (!refresh) {
+        setIsLoading(true);
+      }
       setLoadError(null);
       
       try {
@@ -100,6 +102,16 @@ const TeaCollection = () => {
     };
     
     loadData();
+    
+    // Show fresh data once the background refresh has stored it, and reload
+    // when another client changes the sessions or teas
+    const unsubscribeStore = subscribeToStoreUpdates(() => loadData(true));
+    const unsubscribeChanges = subscribeToChanges(() => loadData(true));
+    
+    return () => {
+      unsubscribeStore();
+      unsubscribeChanges();
+    };
   }, [showNotification]);
 
   // Handle retry loading
@@ -3,7 +3,7 @@ import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { useNavigate, useLocation } from 'react-router-dom';
 import { PlusCircle, Clock, Menu, X, ChevronDown } from 'lucide-react';
 import './TeaLogger.css';
-import { fetchDashboardData, createSession, getSyncStatus, forceSync } from '../api';
+import { fetchDashboardData, createSession, getSyncStatus, forceSync, subscribeToStoreUpdates, subscribeToChanges } from '../api';
 
 // Import custom hooks
 import { useNotification } from '../hooks/useNotification';
@@ -29,6 +29,9 @@ const KNOWN_VENDORS = {
   'teamania': 'Teamania',
 };
 
+// How often pending changes are synced to Google Drive (milliseconds)
+const SYNC_CHECK_INTERVAL = 10 * 60 * 1000;
+
 // Example suggestions for quick input
 const SUGGESTED_TEAS = [
   { name: "White2Tea Hot Brandy", tag: "Black" },
@@ -69,8 +72,10 @@ const TeaLogger = () => {
 
   // Load dashboard data on component mount
   useEffect(() => {
-    const loadData = async () => {
-      setIsLoading(true);
+    const loadData = async (refresh = false) => {
+      if (!refresh) {
+        setIsLoading(true);
+      }
       setLoadError(null);
       
       try {
@@ -107,18 +112,28 @@ const TeaLogger = () => {
     };
     
     loadData();
+    
+    // Show fresh data once the background refresh has stored it, and reload
+    // when another client changes the sessions or teas
+    const unsubscribeStore = subscribeToStoreUpdates(() => loadData(true));
+    const unsubscribeChanges = subscribeToChanges(() => loadData(true));
+    
+    return () => {
+      unsubscribeStore();
+      unsubscribeChanges();
+    };
   }, [showNotification]);
   
   // Background sync check
   useEffect(() => {
-    const checkSyncStatus = async () => {
+    const checkSyncStatus = async (syncPending = true) => {
       try {
         const status = await getSyncStatus();
         setSyncStatus(status);
         
         // If Google Drive is enabled and there are pending changes, sync
         const useGoogleDrive = localStorage.getItem('useGoogleDrive') === 'true';
-        if (useGoogleDrive && status.drive_dirty) {
+        if (syncPending && useGoogleDrive && status.drive_dirty) {
           await forceSync();
           // Refresh sessions after sync
           const dashboardData = await fetchDashboardData(true);
@@ -129,11 +144,16 @@ const TeaLogger = () => {
       }
     };
     
-    // Check immediately and then every minute
+    // Check immediately and whenever the data changes; the outbox pushes
+    // changes to Drive itself, so pending changes are only synced every ten minutes
     checkSyncStatus();
-    const intervalId = setInterval(checkSyncStatus, 60000);
+    const unsubscribe = subscribeToChanges(() => checkSyncStatus(false));
+    const intervalId = setInterval(checkSyncStatus, SYNC_CHECK_INTERVAL);
     
-    return () => clearInterval(intervalId);
+    return () => {
+      unsubscribe();
+      clearInterval(intervalId);
+    };
   }, []);
 
   // Parse natural language input for tea
@@ -3,7 +3,7 @@ import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeft, Search, X, Plus, Trash, ChevronDown, ChevronUp } from 'lucide-react';
 import './VendorManagement.css';
-import { fetchDashboardData } from '../api';
+import { fetchDashboardData, fetchDashboardSummary } from '../api';
 import { normalizeVendorName } from '../teaApi';
 
 // Import custom hooks
@@ -172,8 +172,15 @@ const VendorManagement = () => {
         // First set vendors without teas
         setVendors(vendorList);
         
-        // Load teas to populate vendor tea lists
-        const dashboardData = await fetchDashboardData();
+        // Load teas to populate vendor tea lists; only their names and vendors are
+        // needed, so the lean dashboard is enough unless the server is unreachable
+        let dashboardData;
+        try {
+          dashboardData = await fetchDashboardSummary(['name', 'vendor']);
+        } catch (summaryError) {
+          console.warn('Error loading dashboard summary, using stored data:', summaryError);
+          dashboardData = await fetchDashboardData();
+        }
         
         if (dashboardData && Array.isArray(dashboardData.teas)) {
           // Populate vendor teas
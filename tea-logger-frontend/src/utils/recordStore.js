@@ -0,0 +1,103 @@
+// src/utils/recordStore.js - IndexedDB cache of sessions and teas, keyed by record id
+//
+// The schema and the diffing writes live in public/record-db.js, which the
+// service worker loads as well, so both update the database the same way.
+// index.html loads it before the app as window.TeaLoggerRecordDB.
+
+const sharedRecordDB = (typeof window !== 'undefined' && window.TeaLoggerRecordDB) || null;
+
+const { SESSIONS_STORE, TEAS_STORE, META_STORE } = sharedRecordDB || {};
+
+// Get the shared database helpers, failing like an unavailable IndexedDB when the script is missing
+const recordDB = () => {
+  if (!sharedRecordDB) {
+    throw new Error('Record database script is not loaded');
+  }
+  return sharedRecordDB;
+};
+
+const runTransaction = async (storeNames, mode, callback) => {
+  return recordDB().runTransaction(storeNames, mode, callback);
+};
+
+// Get the sessions in id order, or null if none are stored
+export const readSessions = async () => {
+  const sessions = await runTransaction([SESSIONS_STORE], 'readonly', (transaction, result) => {
+    const request = transaction.objectStore(SESSIONS_STORE).getAll();
+    request.onsuccess = () => {
+      result.value = request.result;
+    };
+  });
+
+  return sessions.length ? sessions : null;
+};
+
+// Get the dashboard assembled from the stored records, or null if it was never stored
+export const readDashboard = async () => {
+  return runTransaction([SESSIONS_STORE, TEAS_STORE, META_STORE], 'readonly', (transaction, result) => {
+    const meta = transaction.objectStore(META_STORE).get('dashboard');
+    const sessions = transaction.objectStore(SESSIONS_STORE).getAll();
+    const teas = transaction.objectStore(TEAS_STORE).getAll();
+
+    teas.onsuccess = () => {
+      if (meta.result) {
+        result.value = {
+          sessions: sessions.result,
+          teas: teas.result,
+          teaStats: meta.result.teaStats,
+          recentSessions: meta.result.recentSessions
+        };
+      } else {
+        result.value = null;
+      }
+    };
+  });
+};
+
+// Replace the stored sessions; resolves to the number of records written or deleted
+export const storeSessions = async (sessions) => recordDB().storeSessions(sessions);
+
+// Replace the stored dashboard; resolves to the number of records written or deleted
+export const storeDashboard = async (dashboard) => recordDB().storeDashboard(dashboard);
+
+// Store a single created or updated session
+export const putSession = (session) => {
+  return runTransaction([SESSIONS_STORE], 'readwrite', (transaction) => {
+    transaction.objectStore(SESSIONS_STORE).put(session);
+  });
+};
+
+// Get a single stored session
+export const getSession = (id) => {
+  return runTransaction([SESSIONS_STORE], 'readonly', (transaction, result) => {
+    const request = transaction.objectStore(SESSIONS_STORE).get(id);
+    request.onsuccess = () => {
+      result.value = request.result || null;
+    };
+  });
+};
+
+// Remove a single deleted session
+export const deleteStoredSession = (id) => {
+  return runTransaction([SESSIONS_STORE], 'readwrite', (transaction) => {
+    transaction.objectStore(SESSIONS_STORE).delete(id);
+  });
+};
+
+// Move sessions cached in localStorage by earlier versions into the store, once
+export const migrateLocalStorageSessions = async () => {
+  const legacy = localStorage.getItem('cachedSessions') || localStorage.getItem('teaSessions');
+  if (legacy) {
+    const stored = await readSessions();
+    if (!stored) {
+      const sessions = JSON.parse(legacy).filter(session => session && session.id != null);
+      await runTransaction([SESSIONS_STORE], 'readwrite', (transaction) => {
+        const store = transaction.objectStore(SESSIONS_STORE);
+        sessions.forEach(session => store.put(session));
+      });
+    }
+  }
+
+  localStorage.removeItem('cachedSessions');
+  localStorage.removeItem('cachedDashboard');
+};